@@ -1,3 +1,39 @@
+import ast
+import contextlib
+import csv
+import heapq
+import io
+import itertools
+import json
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from collections.abc import Sequence
+
+# NumPy необязателен: без него векторные фильтры вычисляются поэлементно
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Именованные условия для filter_strings: имя -> метод str и функция np.char
+# с тем же названием
+STRING_PREDICATES = {
+    'upper': 'isupper',
+    'lower': 'islower',
+    'title': 'istitle',
+    'alpha': 'isalpha',
+    'alnum': 'isalnum',
+    'digit': 'isdigit',
+    'decimal': 'isdecimal',
+    'numeric': 'isnumeric',
+    'space': 'isspace'
+}
+
+
 # а) Функция pair_and_filter
 def pair_and_filter(list1, list2, filter_function=None):
     """
@@ -23,13 +59,160 @@ def pair_and_filter(list1, list2, filter_function=None):
     return result
 
 
+def iter_pair_and_filter(list1, list2, filter_function=None, chunk_size=None):
+    """
+    Ленивая версия pair_and_filter: пары (x, y) выдаются по одной,
+    без построения списка всех |list1| × |list2| пар.
+    
+    Параметры:
+    list1, list2: последовательности (или любые итерируемые объекты) элементов
+    filter_function: необязательная функция, возвращающая True для пар,
+                    которые должны быть включены в результат
+    chunk_size: если указан, пары выдаются списками не более чем по chunk_size
+    
+    Возвращает:
+    Генератор пар (x, y) в том же порядке, что и pair_and_filter,
+    или генератор списков пар, если указан chunk_size.
+    
+    Первые N пар можно получить через itertools.islice, количество -
+    через sum(1 for _ in ...), не храня пары в памяти.
+    """
+    pairs = itertools.product(list1, list2)
+    if filter_function is not None:
+        pairs = (pair for pair in pairs if filter_function(*pair))
+    
+    if chunk_size is None:
+        return pairs
+    
+    if chunk_size < 1:
+        raise ValueError("chunk_size должен быть положительным")
+    return _iter_chunks(pairs, chunk_size)
+
+
+def _iter_chunks(iterable, chunk_size):
+    """Разбивает итерируемый объект на списки длиной не более chunk_size"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def pair_and_filter_pushdown(list1, list2, x_filter=None, y_filter=None, vectorized_filter=None,
+                             exclude_pairs=None, filter_function=None, block_size=2**20):
+    """
+    Версия pair_and_filter с "проталкиванием" условий до построения пар.
+    
+    Условия на x и на y по отдельности применяются к list1 и list2 один раз
+    на элемент, а не на каждую пару. Арифметическое условие на пару
+    вычисляется векторно над сеткой NumPy (x - столбец, y - строка), без
+    вызова функции Python для каждой пары.
+    
+    Параметры:
+    list1, list2: списки элементов
+    x_filter: необязательная функция от x; элементы list1, для которых она
+              возвращает False, не участвуют в парах
+    y_filter: то же для элементов list2
+    vectorized_filter: необязательная функция от (X, Y), где X и Y - массивы
+                       NumPy, возвращающая булев массив (например,
+                       lambda X, Y: (X + Y) % 2 == 0); int вычисляются
+                       как целые Python, float - как float64. Без NumPy,
+                       для других элементов (см. _vectorizable_array) или
+                       при ошибке арифметики (деление на ноль, переполнение
+                       float64) вызывается для каждой пары
+    exclude_pairs: необязательное множество пар (x, y), исключаемых из результата
+    filter_function: необязательная функция от (x, y) для оставшихся условий,
+                    вызывается только для пар, прошедших остальные фильтры
+    block_size: сколько пар вычислять векторно за один раз (ограничивает память)
+    
+    Возвращает:
+    Список кортежей (x, y) в том же порядке, что и pair_and_filter.
+    """
+    list1 = [x for x in list1 if x_filter(x)] if x_filter is not None else list(list1)
+    list2 = [y for y in list2 if y_filter(y)] if y_filter is not None else list(list2)
+    
+    if not list1 or not list2:
+        return []
+    
+    if vectorized_filter is None:
+        pairs = itertools.product(list1, list2)
+    else:
+        pairs = _iter_vectorized_pairs(list1, list2, vectorized_filter, block_size)
+    
+    if exclude_pairs:
+        excluded = set(exclude_pairs)
+        pairs = (pair for pair in pairs if pair not in excluded)
+    
+    if filter_function is not None:
+        pairs = (pair for pair in pairs if filter_function(*pair))
+    
+    return list(pairs)
+
+
+def _iter_vectorized_pairs(list1, list2, vectorized_filter, block_size):
+    """
+    Выдает пары (x, y), для которых vectorized_filter истинен, вычисляя его
+    над блоками строк сетки list1 × list2.
+    """
+    xs = _vectorizable_array(list1)
+    ys = _vectorizable_array(list2)
+    
+    # Без NumPy или если NumPy изменил бы результат - поэлементно
+    if xs is None or ys is None:
+        yield from (pair for pair in itertools.product(list1, list2) if vectorized_filter(*pair))
+        return
+    
+    rows = max(1, block_size // len(list2))
+    for start in range(0, len(list1), rows):
+        block = xs[start:start + rows]
+        try:
+            # Деление на ноль и переполнение float64 - исключения, а не inf/nan
+            with np.errstate(all='raise'):
+                mask = np.broadcast_to(
+                    np.asarray(vectorized_filter(block[:, None], ys[None, :]), dtype=bool),
+                    (len(block), len(ys)))
+        except FloatingPointError:
+            # Ошибка арифметики: блок вычисляется поэлементно, как в pair_and_filter
+            yield from (pair for pair in itertools.product(list1[start:start + rows], list2)
+                        if vectorized_filter(*pair))
+            continue
+        # np.nonzero возвращает индексы построчно - порядок как у pair_and_filter
+        row_indices, column_indices = np.nonzero(mask)
+        for i, j in zip(row_indices.tolist(), column_indices.tolist()):
+            yield (list1[start + i], list2[j])
+
+
+def _vectorizable_array(values):
+    """
+    Возвращает массив NumPy для values или None, если векторно их не обработать.
+    
+    Списки из одних float дают массив float64 (арифметика NumPy с плавающей
+    точкой), из одних int (не bool) - массив типа object, в котором операции
+    выполняются над целыми Python без переполнения. Для остальных списков
+    (смешанные типы, bool, строки) возвращается None: NumPy привел бы
+    их к строкам или изменил бы смысл операций.
+    """
+    if np is None:
+        return None
+    
+    value_types = set(map(type, values))
+    if value_types == {float}:
+        return np.array(values, dtype=np.float64)
+    if value_types == {int}:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return None
+
+
 # б) Функция concat_or_upper
 def concat_or_upper(strings, uppercase=False):
     """
     Соединяет строки из списка.
     
     Параметры:
-    strings: список строк
+    strings: список строк (или любой итерируемый объект строк)
     uppercase: если True, строки преобразуются в верхний регистр
     
     Возвращает:
@@ -38,14 +221,47 @@ def concat_or_upper(strings, uppercase=False):
     if not strings:
         return ""
     
-    # Обрабатываем строки в зависимости от параметра uppercase
+    # Соединяем строки пробелами
+    result = " ".join(strings)
+    
+    # Верхний регистр применяется один раз к результату, без списка копий строк
     if uppercase:
-        processed_strings = [s.upper() for s in strings]
-    else:
-        processed_strings = strings
+        result = result.upper()
     
-    # Соединяем строки пробелами
-    return " ".join(processed_strings)
+    return result
+
+
+def write_concat_or_upper(strings, output, uppercase=False, chunk_size=10000):
+    """
+    Потоковая версия concat_or_upper: результат пишется в поток вывода
+    блоками, не собираясь в одну строку в памяти.
+    
+    Параметры:
+    strings: итерируемый объект строк, например
+             (line.rstrip('\n') for line in file)
+    output: текстовый поток с методом write (файл, io.StringIO, sys.stdout)
+    uppercase: если True, строки преобразуются в верхний регистр
+    chunk_size: сколько строк соединять и записывать за раз
+    
+    Возвращает:
+    Количество записанных строк.
+    
+    В output попадает тот же текст, что возвращает concat_or_upper.
+    """
+    count = 0
+    
+    for chunk in _iter_chunks(strings, chunk_size):
+        text = " ".join(chunk)
+        if uppercase:
+            text = text.upper()
+        
+        # Разделитель между блоками
+        if count:
+            output.write(" ")
+        output.write(text)
+        count += len(chunk)
+    
+    return count
 
 
 # в) Функция filter_uppercase_strings
@@ -69,17 +285,157 @@ def filter_uppercase_strings(strings):
     return result
 
 
+def filter_strings(strings, predicates, mode='all', backend='auto'):
+    """
+    Фильтрует строки сразу по нескольким условиям за один проход.
+    
+    Параметры:
+    strings: итерируемый объект строк или массив NumPy строк
+    predicates: список условий; условие - имя из STRING_PREDICATES ('upper',
+                'lower', 'numeric', ...), кортеж ('length', min_len, max_len)
+                (max_len может быть None) или функция от строки
+    mode: 'all' - строки, удовлетворяющие всем условиям,
+          'any' - хотя бы одному условию,
+          'mask' - вместо строк вернуть маску для каждого условия
+    backend: 'python', 'numpy' (векторно через np.char) или 'auto'
+             ('numpy' для массивов NumPy строк типа str_, иначе 'python').
+             'numpy' приводит остальные данные к строкам NumPy фиксированной
+             длины, которые теряют завершающие символы '\x00' - для таких
+             строк результат может отличаться от 'python'
+    
+    Возвращает:
+    Список подходящих строк (для backend='numpy' - массив NumPy), а в режиме
+    'mask' - список масок (списков bool, для 'numpy' - массив формы
+    (количество условий, количество строк)).
+    
+    filter_strings(strings, ['upper']) дает тот же результат, что и
+    filter_uppercase_strings(strings).
+    """
+    if mode not in ('all', 'any', 'mask'):
+        raise ValueError(f"неизвестный режим '{mode}'")
+    if not predicates:
+        raise ValueError("нужно указать хотя бы одно условие")
+    
+    if backend == 'auto':
+        # Списки и массивы object не приводятся к строкам NumPy молча
+        backend = ('numpy' if np is not None and isinstance(strings, np.ndarray)
+                   and strings.dtype.kind == 'U' else 'python')
+    
+    if backend == 'numpy':
+        if np is None:
+            raise ImportError("для backend='numpy' нужен NumPy")
+        return _filter_strings_numpy(strings, predicates, mode)
+    if backend != 'python':
+        raise ValueError(f"неизвестный backend '{backend}'")
+    
+    functions = [_compile_string_predicate(predicate) for predicate in predicates]
+    
+    if mode == 'all':
+        # Цепочка ленивых filter - один проход, проверка прекращается
+        # на первом невыполненном условии
+        matched = strings
+        for function in functions:
+            matched = filter(function, matched)
+        return list(matched)
+    
+    if mode == 'any':
+        return [s for s in strings if any(function(s) for function in functions)]
+    
+    masks = [[] for _ in functions]
+    for s in strings:
+        for mask, function in zip(masks, functions):
+            mask.append(function(s))
+    return masks
+
+
+def _compile_string_predicate(predicate):
+    """Превращает условие filter_strings в функцию от одной строки"""
+    if isinstance(predicate, str):
+        if predicate not in STRING_PREDICATES:
+            raise ValueError(f"неизвестное условие '{predicate}'")
+        return getattr(str, STRING_PREDICATES[predicate])
+    
+    if isinstance(predicate, tuple) and len(predicate) == 3 and predicate[0] == 'length':
+        _, min_len, max_len = predicate
+        if max_len is None:
+            return lambda s: len(s) >= min_len
+        return lambda s: min_len <= len(s) <= max_len
+    
+    if callable(predicate):
+        return predicate
+    
+    raise ValueError(f"неизвестное условие {predicate!r}")
+
+
+def _filter_strings_numpy(strings, predicates, mode):
+    """Векторная версия filter_strings на функциях np.char"""
+    array = np.asarray(strings if isinstance(strings, np.ndarray) else list(strings), dtype=str)
+    
+    masks = []
+    lengths = None
+    for predicate in predicates:
+        if isinstance(predicate, str):
+            if predicate not in STRING_PREDICATES:
+                raise ValueError(f"неизвестное условие '{predicate}'")
+            mask = getattr(np.char, STRING_PREDICATES[predicate])(array)
+        elif isinstance(predicate, tuple) and len(predicate) == 3 and predicate[0] == 'length':
+            _, min_len, max_len = predicate
+            if lengths is None:
+                lengths = np.char.str_len(array)
+            mask = lengths >= min_len
+            if max_len is not None:
+                mask &= lengths <= max_len
+        elif callable(predicate):
+            # Произвольная функция вычисляется поэлементно
+            mask = np.frompyfunc(predicate, 1, 1)(array).astype(bool)
+        else:
+            raise ValueError(f"неизвестное условие {predicate!r}")
+        masks.append(np.asarray(mask, dtype=bool))
+    
+    masks = np.stack(masks)
+    if mode == 'mask':
+        return masks
+    
+    combined = masks.all(axis=0) if mode == 'all' else masks.any(axis=0)
+    return array[combined]
+
+
 # г) Функция unique_sorted_elements
-def unique_sorted_elements(*lists):
+def unique_sorted_elements(*lists, presorted=False, lazy=False, max_items_in_memory=None):
     """
     Объединяет элементы из всех переданных списков, удаляет дубликаты и сортирует.
     
     Параметры:
     *lists: произвольное количество списков
+    presorted: True - списки уже отсортированы (можно передавать итераторы),
+               None - проверить это для списков, False - не проверять
+    lazy: если True, вернуть итератор вместо списка
+    max_items_in_memory: если указан, неотсортированные списки обрабатываются
+                         внешней сортировкой (см. unique_sorted_elements_external),
+                         в памяти хранится не больше указанного числа элементов
     
     Возвращает:
     Отсортированный список уникальных элементов.
+    
+    Отсортированные списки сливаются потоково (heapq.merge) за O(N log k)
+    без промежуточного множества, где k - количество списков. heapq.merge
+    написан на Python, поэтому для списков, целиком помещающихся в памяти,
+    sorted(set(...)) обычно быстрее - слияние включается только явно.
     """
+    if presorted is None:
+        presorted = all(isinstance(lst, Sequence) and _is_sorted(lst) for lst in lists)
+    
+    if presorted:
+        merged = unique_sorted_elements_merge(*lists)
+        return merged if lazy else list(merged)
+    
+    if max_items_in_memory is not None:
+        merged = unique_sorted_elements_external(*lists, max_items_in_memory=max_items_in_memory)
+        return merged if lazy else list(merged)
+    
+    if lazy:
+        return iter(unique_sorted_elements(*lists, presorted=False))
+    
     # Собираем все элементы в один список
     all_elements = []
     for lst in lists:
@@ -89,6 +445,122 @@ def unique_sorted_elements(*lists):
     return sorted(set(all_elements))
 
 
+def unique_sorted_elements_merge(*sorted_lists):
+    """
+    Сливает отсортированные списки, пропуская повторяющиеся элементы.
+    
+    Параметры:
+    *sorted_lists: отсортированные списки или итераторы
+    
+    Возвращает:
+    Генератор уникальных элементов по возрастанию.
+    Дополнительная память - O(k) для k списков.
+    """
+    for element, _ in itertools.groupby(heapq.merge(*sorted_lists)):
+        yield element
+
+
+def unique_sorted_elements_external(*lists, max_items_in_memory=10**6, temp_dir=None,
+                                    max_fan_in=64):
+    """
+    Внешняя (с выгрузкой на диск) версия unique_sorted_elements для данных,
+    не помещающихся в память.
+    
+    Элементы накапливаются в множестве; когда в нем max_items_in_memory
+    элементов, оно сортируется и записывается во временный файл (серию).
+    Затем серии сливаются в несколько проходов: за раз открыто не более
+    max_fan_in серий, так что число открытых файлов не зависит от объема
+    данных. Буфер чтения каждой серии - max_items_in_memory // max_fan_in
+    элементов, поэтому и слияние укладывается в max_items_in_memory.
+    
+    Параметры:
+    *lists: произвольное количество списков или итераторов
+    max_items_in_memory: максимальное число элементов в памяти
+    temp_dir: каталог для временных файлов (по умолчанию системный)
+    max_fan_in: максимальное число серий, сливаемых за один проход (не меньше 2)
+    
+    Возвращает:
+    Генератор уникальных элементов по возрастанию.
+    Элементы должны поддерживать pickle. Временные файлы удаляются
+    после завершения (или закрытия) генератора.
+    """
+    if max_items_in_memory < 1:
+        raise ValueError("max_items_in_memory должен быть положительным")
+    if max_fan_in < 2:
+        raise ValueError("max_fan_in должен быть не меньше 2")
+    
+    # Параметры проверены сразу, а не при первом next() генератора
+    return _iter_unique_sorted_external(lists, max_items_in_memory, temp_dir, max_fan_in)
+
+
+def _iter_unique_sorted_external(lists, max_items_in_memory, temp_dir, max_fan_in):
+    """Генератор внешней сортировки для unique_sorted_elements_external"""
+    block_size = max(1, max_items_in_memory // max_fan_in)
+    run_dir = tempfile.mkdtemp(dir=temp_dir)
+    try:
+        run_paths = []
+        current_run = set()
+        for element in itertools.chain.from_iterable(lists):
+            current_run.add(element)
+            if len(current_run) >= max_items_in_memory:
+                run_paths.append(_write_sorted_run(sorted(current_run), run_dir, block_size))
+                current_run = set()
+        
+        # Все поместилось в память - диск не нужен
+        if not run_paths:
+            yield from sorted(current_run)
+            return
+        
+        if current_run:
+            run_paths.append(_write_sorted_run(sorted(current_run), run_dir, block_size))
+        current_run = None
+        
+        # Промежуточные проходы: группы по max_fan_in серий сливаются в одну
+        while len(run_paths) > max_fan_in:
+            merged_paths = []
+            for start in range(0, len(run_paths), max_fan_in):
+                group = run_paths[start:start + max_fan_in]
+                with contextlib.ExitStack() as stack:
+                    runs = [_read_sorted_run(stack.enter_context(open(path, 'rb')))
+                            for path in group]
+                    merged_paths.append(_write_sorted_run(
+                        unique_sorted_elements_merge(*runs), run_dir, block_size))
+                for path in group:
+                    os.remove(path)
+            run_paths = merged_paths
+        
+        with contextlib.ExitStack() as stack:
+            runs = [_read_sorted_run(stack.enter_context(open(path, 'rb')))
+                    for path in run_paths]
+            yield from unique_sorted_elements_merge(*runs)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def _write_sorted_run(sorted_elements, run_dir, block_size):
+    """Записывает отсортированную серию в файл каталога run_dir блоками по block_size элементов"""
+    fd, run_path = tempfile.mkstemp(dir=run_dir, suffix='.run')
+    with os.fdopen(fd, 'wb') as run_file:
+        for block in _iter_chunks(sorted_elements, block_size):
+            pickle.dump(block, run_file, protocol=pickle.HIGHEST_PROTOCOL)
+    return run_path
+
+
+def _read_sorted_run(run_file):
+    """Читает серию, записанную _write_sorted_run, поблочно"""
+    while True:
+        try:
+            block = pickle.load(run_file)
+        except EOFError:
+            return
+        yield from block
+
+
+def _is_sorted(sequence):
+    """Проверяет, что последовательность отсортирована по неубыванию"""
+    return all(a <= b for a, b in itertools.pairwise(sequence))
+
+
 # Альтернативные реализации для сравнения
 def pair_and_filter_comprehension(list1, list2, filter_function=None):
     """Альтернативная реализация с использованием list comprehension"""
@@ -142,6 +614,11 @@ def demonstrate_functions():
     print(f"pair_and_filter(list3, list4, filter_function=lambda x, y: y > 1) = "
           f"{pair_and_filter(list3, list4, filter_function=filter_func2)}")
     
+    # Ленивая версия: первые 3 пары из 10^5 × 10^5 без построения списка
+    lazy_pairs = iter_pair_and_filter(range(10**5), range(10**5), filter_function=filter_func)
+    print(f"\nПервые 3 пары из range(10**5) × range(10**5) с четной суммой: "
+          f"{list(itertools.islice(lazy_pairs, 3))}")
+    
     # б) Демонстрация concat_or_upper
     print("\n\nб) ФУНКЦИЯ concat_or_upper:")
     print("-" * 40)
@@ -218,6 +695,42 @@ def run_tests():
     else:
         print(f"   ✗ Тест 2 не пройден: ожидалось {expected}, получено {result}")
     
+    # Тест 3: Ленивая версия совпадает с pair_and_filter, в том числе по блокам
+    result = list(iter_pair_and_filter([1, 2, 3], [3, 4], filter_function=filter_func))
+    chunks = list(iter_pair_and_filter([1, 2, 3], [3, 4], filter_function=filter_func, chunk_size=2))
+    expected = pair_and_filter([1, 2, 3], [3, 4], filter_function=filter_func)
+    total_tests += 1
+    if result == expected and chunks == [expected[:2], expected[2:]]:
+        print("   ✓ Тест 3 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 3 не пройден: ожидалось {expected}, получено {result}, {chunks}")
+    
+    # Тест 4: Проталкивание условий дает тот же результат, что и обычный фильтр
+    result = pair_and_filter_pushdown(range(6), range(6), y_filter=lambda y: y > 1,
+                                      vectorized_filter=lambda x, y: (x + y) % 2 == 0,
+                                      exclude_pairs={(0, 2)})
+    expected = pair_and_filter(range(6), range(6),
+                               filter_function=lambda x, y: y > 1 and (x + y) % 2 == 0
+                               and (x, y) != (0, 2))
+    total_tests += 1
+    if result == expected:
+        print("   ✓ Тест 4 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 4 не пройден: ожидалось {expected}, получено {result}")
+    
+    # Тест 5: Цепочка умножений не переполняется (в int64 2**30 * 2**30 * 16 == 0)
+    big_filter = lambda x, y: x * y * 16 > 0
+    result = pair_and_filter_pushdown([2**30, 3], [2**30, 3], vectorized_filter=big_filter)
+    expected = pair_and_filter([2**30, 3], [2**30, 3], filter_function=big_filter)
+    total_tests += 1
+    if result == expected:
+        print("   ✓ Тест 5 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 5 не пройден: ожидалось {expected}, получено {result}")
+    
     # Тесты для concat_or_upper
     print("\n2. Тестирование concat_or_upper:")
     
@@ -241,6 +754,18 @@ def run_tests():
     else:
         print(f"   ✗ Тест 2 не пройден: ожидалось '{expected}', получено '{result}'")
     
+    # Тест 3: Потоковая запись совпадает с concat_or_upper
+    words = ['straße', 'a', '', 'b'] * 3
+    output = io.StringIO()
+    write_concat_or_upper(iter(words), output, uppercase=True, chunk_size=5)
+    expected = concat_or_upper(words, uppercase=True)
+    total_tests += 1
+    if output.getvalue() == expected:
+        print("   ✓ Тест 3 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 3 не пройден: ожидалось '{expected}', получено '{output.getvalue()}'")
+    
     # Тесты для filter_uppercase_strings
     print("\n3. Тестирование filter_uppercase_strings:")
     
@@ -264,6 +789,19 @@ def run_tests():
     else:
         print(f"   ✗ Тест 2 не пройден: ожидалось {expected}, получено {result}")
     
+    # Тест 3: Движок фильтрации по нескольким условиям
+    strings = ['HELLO', 'World', 'BYE', 'OK', '123', 'abc']
+    result = filter_strings(strings, ['upper', ('length', 3, None)])
+    masks = filter_strings(strings, ['upper', 'numeric'], mode='mask')
+    expected = ['HELLO', 'BYE']
+    total_tests += 1
+    if (result == expected and masks[0] == [s.isupper() for s in strings]
+            and masks[1] == [s.isnumeric() for s in strings]):
+        print("   ✓ Тест 3 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 3 не пройден: ожидалось {expected}, получено {result}")
+    
     # Тесты для unique_sorted_elements
     print("\n4. Тестирование unique_sorted_elements:")
     
@@ -287,6 +825,56 @@ def run_tests():
     else:
         print(f"   ✗ Тест 2 не пройден: ожидалось {expected}, получено {result}")
     
+    # Тест 3: Отсортированные входы сливаются, в том числе лениво
+    shards = [[1, 3, 5], [1, 2, 5, 8], [], [2, 9]]
+    result = unique_sorted_elements(*shards, presorted=None)
+    lazy_result = unique_sorted_elements(*map(iter, shards), presorted=True, lazy=True)
+    expected = unique_sorted_elements_set(*shards)
+    total_tests += 1
+    if result == expected and list(lazy_result) == expected:
+        print("   ✓ Тест 3 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 3 не пройден: ожидалось {expected}, получено {result}")
+    
+    # Тест 4: Внешняя сортировка с маленьким бюджетом памяти
+    result = unique_sorted_elements([5, 3, 9, 1], [3, 7, 1], [2, 9, 8], max_items_in_memory=2)
+    expected = unique_sorted_elements([5, 3, 9, 1], [3, 7, 1], [2, 9, 8])
+    total_tests += 1
+    if result == expected:
+        print("   ✓ Тест 4 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 4 не пройден: ожидалось {expected}, получено {result}")
+    
+    # Тесты для разбора ввода
+    print("\n5. Тестирование parse_list_input:")
+    
+    # Тест 1: Литералы Python и JSON, код не выполняется
+    try:
+        parse_list_input("__import__('os').getcwd()")
+        rejected = False
+    except ValueError:
+        rejected = True
+    result = [parse_list_input("[1, 'a', (2, 3)]"), parse_list_input('["x", 1.5, null]')]
+    expected = [[1, 'a', (2, 3)], ['x', 1.5, None]]
+    total_tests += 1
+    if result == expected and rejected:
+        print("   ✓ Тест 1 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 1 не пройден: ожидалось {expected}, получено {result}")
+    
+    # Тест 2: В CSV числами считаются только десятичные записи
+    result = [_parse_csv_value(cell) for cell in ['7', '-2.5', '1e3', 'nan', 'inf', '1_0']]
+    expected = [7, -2.5, 1000.0, 'nan', 'inf', '1_0']
+    total_tests += 1
+    if result == expected:
+        print("   ✓ Тест 2 пройден")
+        tests_passed += 1
+    else:
+        print(f"   ✗ Тест 2 не пройден: ожидалось {expected}, получено {result}")
+    
     # Итоги тестирования
     print("\n" + "=" * 40)
     print(f"ИТОГИ ТЕСТИРОВАНИЯ: {tests_passed}/{total_tests} тестов пройдено")
@@ -364,6 +952,99 @@ def practical_examples():
     print(f"   Возможные комбинации (исключая 'бананы + 30%'):")
     for product, discount in combos:
         print(f"   - {product} со скидкой {discount}")
+    
+    # То же без вызова лямбды для каждой пары
+    combos_pushdown = pair_and_filter_pushdown(products, discounts,
+                                               exclude_pairs={('бананы', '30%')})
+    print(f"   Результат pair_and_filter_pushdown совпадает: {combos_pushdown == combos}")
+
+
+# Именованные фильтры пар для интерактивного режима (вместо eval)
+PAIR_FILTERS = {
+    'even_sum': lambda x, y: (x + y) % 2 == 0,
+    'odd_sum': lambda x, y: (x + y) % 2 == 1,
+    'even_product': lambda x, y: (x * y) % 2 == 0,
+    'x_less_y': lambda x, y: x < y,
+    'x_greater_y': lambda x, y: x > y,
+    'equal': lambda x, y: x == y,
+    'not_equal': lambda x, y: x != y
+}
+
+
+def parse_list_input(text):
+    """
+    Разбирает введенный пользователем список без выполнения кода.
+    
+    Параметры:
+    text: литерал списка ([1, 2, 3], ['a', 'b'] или JSON) либо '@путь'
+          к файлу (.json, .jsonl, .csv или текстовый файл - по строке на элемент)
+    
+    Возвращает:
+    Список элементов.
+    
+    Большие списки в формате JSON разбираются быстрым json.loads,
+    остальные литералы - ast.literal_eval.
+    """
+    text = text.strip()
+    if text.startswith('@'):
+        return load_list_from_file(text[1:].strip())
+    
+    try:
+        value = json.loads(text)
+    except ValueError:
+        try:
+            value = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            raise ValueError(f"не удалось разобрать список: {text[:50]!r}") from None
+    
+    if not isinstance(value, (list, tuple, set)):
+        raise ValueError("ожидался список, например [1, 2, 3]")
+    return list(value)
+
+
+def load_list_from_file(file_path):
+    """
+    Загружает список из файла, читая построчно там, где это возможно.
+    
+    Параметры:
+    file_path: путь к файлу; .json - JSON-массив, .jsonl - по значению JSON
+               в строке, .csv - все ячейки подряд (числа преобразуются в
+               int/float), иначе - строки файла без перевода строки
+    
+    Возвращает:
+    Список элементов.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    
+    with open(file_path, 'r', encoding='utf-8', newline='' if extension == '.csv' else None) as file:
+        if extension == '.json':
+            value = json.load(file)
+            if not isinstance(value, list):
+                raise ValueError(f"файл '{file_path}' должен содержать JSON-массив")
+            return value
+        
+        if extension == '.jsonl':
+            return [json.loads(line) for line in file if line.strip()]
+        
+        if extension == '.csv':
+            return [_parse_csv_value(cell) for row in csv.reader(file) for cell in row]
+        
+        return [line.rstrip('\n') for line in file]
+
+
+# Десятичные записи чисел в ячейках CSV; 'nan', 'inf', '1_0' и т.п.
+# остаются строками, хотя int() и float() их принимают
+CSV_INT_PATTERN = re.compile(r'\s*[+-]?[0-9]+\s*')
+CSV_FLOAT_PATTERN = re.compile(r'\s*[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?\s*')
+
+
+def _parse_csv_value(cell):
+    """Преобразует ячейку CSV в int или float, если это десятичное число, иначе оставляет строкой"""
+    if CSV_INT_PATTERN.fullmatch(cell):
+        return int(cell)
+    if CSV_FLOAT_PATTERN.fullmatch(cell):
+        return float(cell)
+    return cell
 
 
 # Интерактивный режим
@@ -391,12 +1072,15 @@ def interactive_mode():
         elif choice == '1':
             print("\nТестирование pair_and_filter:")
             try:
-                list1 = eval(input("Введите первый список (например, [1, 2, 3]): "))
-                list2 = eval(input("Введите второй список (например, ['a', 'b']): "))
-                filter_input = input("Введите фильтрующую функцию (или оставьте пустым): ").strip()
+                list1 = parse_list_input(input("Введите первый список (например, [1, 2, 3] или @файл.json): "))
+                list2 = parse_list_input(input("Введите второй список (например, ['a', 'b']): "))
+                filter_input = input(f"Введите имя фильтра ({', '.join(PAIR_FILTERS)}) "
+                                     f"или оставьте пустым: ").strip()
                 
                 if filter_input:
-                    filter_func = eval(filter_input)
+                    if filter_input not in PAIR_FILTERS:
+                        raise ValueError(f"неизвестный фильтр '{filter_input}'")
+                    filter_func = PAIR_FILTERS[filter_input]
                     result = pair_and_filter(list1, list2, filter_function=filter_func)
                 else:
                     result = pair_and_filter(list1, list2)
@@ -410,7 +1094,7 @@ def interactive_mode():
             print("\nТестирование concat_or_upper:")
             try:
                 strings_input = input("Введите список строк (например, ['hello', 'world']): ")
-                strings = eval(strings_input)
+                strings = parse_list_input(strings_input)
                 uppercase_input = input("Преобразовать в верхний регистр? (y/n): ").strip().lower()
                 
                 uppercase = uppercase_input == 'y'
@@ -425,7 +1109,7 @@ def interactive_mode():
             print("\nТестирование filter_uppercase_strings:")
             try:
                 strings_input = input("Введите список строк (например, ['HELLO', 'World', 'TEST']): ")
-                strings = eval(strings_input)
+                strings = parse_list_input(strings_input)
                 result = filter_uppercase_strings(strings)
                 
                 print(f"\nРезультат: {result}")
@@ -441,7 +1125,7 @@ def interactive_mode():
                 
                 for i in range(num_lists):
                     lst_input = input(f"Введите список {i+1}: ")
-                    lists.append(eval(lst_input))
+                    lists.append(parse_list_input(lst_input))
                 
                 result = unique_sorted_elements(*lists)
                 print(f"\nРезультат: {result}")
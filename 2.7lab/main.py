@@ -1,9 +1,269 @@
+import argparse
+import asyncio
+import codecs
+import concurrent.futures
+import contextlib
+import fnmatch
+import functools
+import glob
+import hashlib
+import io
+import json
+import mmap
 import os
+import re
+import sys
 import tempfile
 import shutil
+import time
 
 
-def replace_empty_lines_with_string_v1(file_path, replacement_string):
+# Пробельные символы str.strip(), кроме переводов строки: строка,
+# состоящая только из них, считается пустой
+WHITESPACE_CHARS = ('\t\x0b\x0c\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+                    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+                    '\u2028\u2029\u202f\u205f\u3000')
+_ASCII_WHITESPACE = ''.join(char for char in WHITESPACE_CHARS if char < '\x80')
+_UNICODE_WHITESPACE = [char.encode('utf-8') for char in WHITESPACE_CHARS if char >= '\x80']
+# Начальные байты многобайтовых пробельных символов
+_UNICODE_WHITESPACE_PREFIXES = sorted({char[:2] for char in _UNICODE_WHITESPACE})
+_ASCII_WHITESPACE_CLASS = rb'[' + re.escape(_ASCII_WHITESPACE.encode('ascii')) + rb']'
+_WHITESPACE_PATTERN = (rb'(?:' + _ASCII_WHITESPACE_CLASS + rb'|'
+                       + b'|'.join(map(re.escape, _UNICODE_WHITESPACE)) + rb')')
+
+# Пустая строка между двумя '\n' (в кодировке UTF-8); второй '\n' не поглощается,
+# чтобы подряд идущие пустые строки находились все
+EMPTY_LINE_PATTERN = re.compile(rb'\n' + _WHITESPACE_PATTERN + rb'*(?=\n)')
+# Быстрый вариант для блоков без многобайтовых пробельных символов
+ASCII_EMPTY_LINE_PATTERN = re.compile(rb'\n' + _ASCII_WHITESPACE_CLASS + rb'*(?=\n)')
+# Пустая первая строка файла и пустая строка после '\n' (в том числе последняя без '\n')
+FIRST_LINE_EMPTY_PATTERN = re.compile(_WHITESPACE_PATTERN + rb'*(?:\n|\Z)')
+INNER_LINE_EMPTY_PATTERN = re.compile(
+    rb'\n(?:' + _WHITESPACE_PATTERN + rb'*(?=\n)|' + _WHITESPACE_PATTERN + rb'+\Z)')
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def _empty_line_patterns(encoding):
+    """
+    Возвращает регулярные выражения поиска пустых строк для файла в кодировке encoding.
+    
+    Для UTF-8 учитываются все пробельные символы str.strip(). Для других
+    ASCII-совместимых кодировок (cp1251, latin-1 и т.п.) - ASCII-пробелы и
+    однобайтовые символы кодировки, которые являются пробельными. Файл при этом
+    не декодируется.
+    
+    Параметры:
+    encoding (str): кодировка файла
+    
+    Возвращает:
+    tuple: (шаблон пустой строки, быстрый шаблон, префиксы многобайтовых пробелов,
+            шаблон пустой первой строки, шаблон пустой строки после '\n')
+    """
+    name = codecs.lookup(encoding).name
+    if name == 'utf-8':
+        return (EMPTY_LINE_PATTERN, ASCII_EMPTY_LINE_PATTERN, _UNICODE_WHITESPACE_PREFIXES,
+                FIRST_LINE_EMPTY_PATTERN, INNER_LINE_EMPTY_PATTERN)
+    
+    ascii_bytes = bytes(range(0x80))
+    try:
+        compatible = ascii_bytes.decode(name) == ascii_bytes.decode('ascii')
+    except UnicodeDecodeError:
+        compatible = False
+    if not compatible:
+        raise ValueError(f"кодировка '{encoding}' несовместима с ASCII")
+    
+    whitespace = _ASCII_WHITESPACE.encode('ascii')
+    for byte in range(0x80, 0x100):
+        try:
+            char = bytes([byte]).decode(name)
+        except UnicodeDecodeError:
+            continue
+        if len(char) == 1 and char in WHITESPACE_CHARS:
+            whitespace += bytes([byte])
+    
+    whitespace_class = rb'[' + re.escape(whitespace) + rb']'
+    empty_pattern = re.compile(rb'\n' + whitespace_class + rb'*(?=\n)')
+    
+    return (empty_pattern, empty_pattern, [],
+            re.compile(whitespace_class + rb'*(?:\n|\Z)'),
+            re.compile(rb'\n(?:' + whitespace_class + rb'*(?=\n)|' + whitespace_class + rb'+\Z)'))
+
+
+def _analysis_after_replacement(total_lines, replaced_count, kept_empty_count, replacement_string):
+    """
+    Вычисляет результат analyze_file_empty_lines для файла после замены,
+    не перечитывая файл.
+    
+    Параметры:
+    total_lines (int): количество строк до замены
+    replaced_count (int): количество замененных строк
+    kept_empty_count (int): количество пустых строк, оставленных без замены
+    replacement_string (str): строка замены
+    
+    Возвращает:
+    dict: {'total', 'empty', 'percentage'}
+    """
+    # Строка замены сама может состоять из нескольких (в том числе пустых) строк
+    replacement_lines = list(io.StringIO(replacement_string + '\n', newline=None))
+    replacement_empty = sum(1 for line in replacement_lines if line.strip() == '')
+    
+    total = total_lines + replaced_count * (len(replacement_lines) - 1)
+    empty = kept_empty_count + replaced_count * replacement_empty
+    percentage = (empty / total * 100) if total > 0 else 0
+    
+    return {'total': total, 'empty': empty, 'percentage': percentage}
+
+
+class _HashingFileIO(io.FileIO):
+    """
+    Файл, который обновляет хеш всеми записанными в него байтами
+    (хеш содержимого вычисляется без повторного чтения файла).
+    """
+    
+    def __init__(self, fd, content_hash):
+        super().__init__(fd, 'wb')
+        self.content_hash = content_hash
+    
+    def write(self, data):
+        written = super().write(data)
+        if written and self.content_hash is not None:
+            self.content_hash.update(memoryview(data).cast('B')[:written])
+        return written
+
+
+@contextlib.contextmanager
+def _create_temp_file(file_path, mode='w', content_hash=None, encoding=None, buffering=-1):
+    """
+    Создает временный файл в каталоге file_path, чтобы замена исходного
+    файла была атомарным переименованием в пределах одной файловой системы.
+    Для символической ссылки используется каталог файла, на который она указывает.
+    
+    Параметры:
+    file_path (str): путь к заменяемому файлу
+    mode (str): 'w' - текстовый файл, 'wb' - двоичный
+    content_hash: объект hashlib; если передан, обновляется записываемыми байтами
+    encoding (str): кодировка текстового файла
+    buffering (int): размер буфера записи (-1 - по умолчанию)
+    
+    Возвращает:
+    контекстный менеджер с открытым временным файлом (имя в атрибуте name);
+    перед закрытием содержимое файла сбрасывается на диск (fsync)
+    """
+    file_dir = os.path.dirname(os.path.realpath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=file_dir, suffix='.tmp')
+    
+    raw_file = _HashingFileIO(fd, content_hash)
+    raw_file.name = temp_path
+    temp_file = io.BufferedWriter(raw_file, buffering if buffering > 0 else io.DEFAULT_BUFFER_SIZE)
+    if 'b' not in mode:
+        temp_file = io.TextIOWrapper(temp_file, encoding=encoding)
+    
+    with temp_file:
+        yield temp_file
+        
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+
+
+def _update_hash_from_file(content_hash, file_path):
+    """
+    Обновляет хеш содержимым файла (когда его нельзя получить при записи).
+    """
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            content_hash.update(chunk)
+
+
+def _remove_temp_file(temp_path):
+    """
+    Удаляет временный файл, если он остался после ошибки.
+    """
+    if temp_path is not None and os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def _fsync_directory(directory):
+    """
+    Сбрасывает на диск запись каталога (результат переименования).
+    На системах, где каталог нельзя открыть (Windows), ничего не делает.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _replace_atomically(temp_path, file_path, pending_replacements=None):
+    """
+    Заменяет file_path временным файлом temp_path с сохранением прав доступа.
+    
+    Временный файл уже сброшен на диск (_create_temp_file), поэтому при сбое файл остается либо старым, либо новым целиком.
+    Символическая ссылка не заменяется: изменяется файл, на который она указывает.
+    
+    Параметры:
+    temp_path (str): временный файл в том же каталоге
+    file_path (str): заменяемый файл
+    pending_replacements (list): если передан, пара (temp_path, file_path)
+                                 добавляется в него, а замена и синхронизация каталога
+                                 выполняются позже в commit_replacements
+    """
+    if pending_replacements is not None:
+        pending_replacements.append((temp_path, file_path))
+        return
+    
+    target_path = os.path.realpath(file_path)
+    shutil.copymode(target_path, temp_path)
+    os.replace(temp_path, target_path)
+    _fsync_directory(os.path.dirname(target_path))
+
+
+def commit_replacements(pending_replacements):
+    """
+    Выполняет отложенные замены файлов пачкой.
+    
+    Данные временных файлов уже сброшены на диск при записи
+    (_create_temp_file), поэтому здесь файлы только переименовываются,
+    а каждый затронутый каталог синхронизируется один раз за пачку.
+    
+    Параметры:
+    pending_replacements (list): пары (temp_path, file_path); список очищается
+    
+    Возвращает:
+    dict: {file_path: текст ошибки} для файлов, которые заменить не удалось
+    """
+    errors = {}
+    if not pending_replacements:
+        return errors
+    
+    directories = set()
+    for temp_path, file_path in pending_replacements:
+        try:
+            target_path = os.path.realpath(file_path)
+            shutil.copymode(target_path, temp_path)
+            os.replace(temp_path, target_path)
+            directories.add(os.path.dirname(target_path))
+        except OSError as e:
+            errors[file_path] = str(e)
+            _remove_temp_file(temp_path)
+    
+    for directory in directories:
+        _fsync_directory(directory)
+    
+    pending_replacements.clear()
+    return errors
+
+
+def replace_empty_lines_with_string_v1(file_path, replacement_string, analysis=None,
+                                       pending_replacements=None, content_hash=None):
     """
     Заменяет все пустые строки в файле на заданную строку S.
     Версия 1: Чтение всего файла в память.
@@ -11,6 +271,12 @@ def replace_empty_lines_with_string_v1(file_path, replacement_string):
     Параметры:
     file_path (str): путь к файлу
     replacement_string (str): строка S для замены пустых строк
+    analysis (dict): если передан, заполняется анализом файла после замены
+                     (как analyze_file_empty_lines), без повторного чтения
+    pending_replacements (list): если передан, замена исходного файла откладывается
+                                 до commit_replacements (общая синхронизация каталогов)
+    content_hash: объект hashlib; если передан, обновляется содержимым файла
+                  после замены (вычисляется при записи, без повторного чтения)
     
     Возвращает:
     bool: True, если операция успешна, иначе False
@@ -18,6 +284,8 @@ def replace_empty_lines_with_string_v1(file_path, replacement_string):
     Примечание: Пустой строкой считается строка, содержащая только символы пробела,
     табуляции или перевод строки (т.е. strip() возвращает пустую строку).
     """
+    temp_path = None
+    
     try:
         # Проверка существования файла
         if not os.path.exists(file_path):
@@ -29,6 +297,12 @@ def replace_empty_lines_with_string_v1(file_path, replacement_string):
             print(f"Ошибка: '{file_path}' не является файлом")
             return False
         
+        # Файл без пустых строк не перезаписываем
+        file_info = {}
+        if not file_needs_rewrite(file_path, file_info=file_info, content_hash=content_hash):
+            _skip_unchanged_file(file_path, replacement_string, analysis, file_info['total_lines'])
+            return True
+        
         # Чтение файла
         with open(file_path, 'r', encoding='utf-8') as file:
             lines = file.readlines()
@@ -44,25 +318,36 @@ def replace_empty_lines_with_string_v1(file_path, replacement_string):
             else:
                 modified_lines.append(line)
         
-        # Запись изменений обратно в файл
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.writelines(modified_lines)
+        # Запись во временный файл и атомарная замена исходного
+        with _create_temp_file(file_path, 'w', content_hash=content_hash,
+                               encoding='utf-8') as temp_file:
+            temp_path = temp_file.name
+            temp_file.writelines(modified_lines)
+        _replace_atomically(temp_path, file_path, pending_replacements)
+        
+        if analysis is not None:
+            analysis.update(_analysis_after_replacement(
+                len(lines), empty_lines_count, 0, replacement_string))
         
         print(f"Успешно заменено {empty_lines_count} пустых строк на '{replacement_string}'")
         return True
         
     except PermissionError:
         print(f"Ошибка: недостаточно прав для записи в файл '{file_path}'")
+        _remove_temp_file(temp_path)
         return False
     except UnicodeDecodeError:
         print(f"Ошибка: не удается декодировать файл '{file_path}' как UTF-8")
+        print("Для файлов в других кодировках используйте версию 4 с параметром encoding.")
         return False
     except Exception as e:
         print(f"Неизвестная ошибка: {e}")
+        _remove_temp_file(temp_path)
         return False
 
 
-def replace_empty_lines_with_string_v2(file_path, replacement_string):
+def replace_empty_lines_with_string_v2(file_path, replacement_string, analysis=None,
+                                       pending_replacements=None, content_hash=None):
     """
     Заменяет все пустые строки в файле на заданную строку S.
     Версия 2: Использование временного файла для безопасности.
@@ -70,6 +355,12 @@ def replace_empty_lines_with_string_v2(file_path, replacement_string):
     Параметры:
     file_path (str): путь к файлу
     replacement_string (str): строка S для замены пустых строк
+    analysis (dict): если передан, заполняется анализом файла после замены
+                     (как analyze_file_empty_lines), без повторного чтения
+    pending_replacements (list): если передан, замена исходного файла откладывается
+                                 до commit_replacements (общая синхронизация каталогов)
+    content_hash: объект hashlib; если передан, обновляется содержимым файла
+                  после замены (вычисляется при записи, без повторного чтения)
     
     Возвращает:
     bool: True, если операция успешна, иначе False
@@ -84,24 +375,36 @@ def replace_empty_lines_with_string_v2(file_path, replacement_string):
             print(f"Ошибка: '{file_path}' не является файлом")
             return False
         
-        # Создаем временный файл
-        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, 
-                                       suffix='.tmp') as temp_file:
+        # Файл без пустых строк не перезаписываем
+        file_info = {}
+        if not file_needs_rewrite(file_path, file_info=file_info, content_hash=content_hash):
+            _skip_unchanged_file(file_path, replacement_string, analysis, file_info['total_lines'])
+            return True
+        
+        # Создаем временный файл в том же каталоге
+        with _create_temp_file(file_path, 'w', content_hash=content_hash,
+                               encoding='utf-8') as temp_file:
             temp_path = temp_file.name
             
             # Открываем исходный файл и временный файл
             with open(file_path, 'r', encoding='utf-8') as source_file:
                 empty_lines_count = 0
+                total_lines = 0
                 
                 for line in source_file:
+                    total_lines += 1
                     if line.strip() == '':  # Пустая строка
                         temp_file.write(replacement_string + '\n')
                         empty_lines_count += 1
                     else:
                         temp_file.write(line)
         
-        # Заменяем исходный файл временным
-        shutil.move(temp_path, file_path)
+        # Заменяем исходный файл временным (переименование без копирования)
+        _replace_atomically(temp_path, file_path, pending_replacements)
+        
+        if analysis is not None:
+            analysis.update(_analysis_after_replacement(
+                total_lines, empty_lines_count, 0, replacement_string))
         
         print(f"Успешно заменено {empty_lines_count} пустых строк на '{replacement_string}'")
         return True
@@ -114,6 +417,7 @@ def replace_empty_lines_with_string_v2(file_path, replacement_string):
         return False
     except UnicodeDecodeError:
         print(f"Ошибка: не удается декодировать файл '{file_path}' как UTF-8")
+        print("Для файлов в других кодировках используйте версию 4 с параметром encoding.")
         if 'temp_path' in locals() and os.path.exists(temp_path):
             os.remove(temp_path)
         return False
@@ -124,7 +428,8 @@ def replace_empty_lines_with_string_v2(file_path, replacement_string):
         return False
 
 
-def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_whitespace_only=False):
+def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_whitespace_only=False,
+                                       analysis=None, pending_replacements=None, content_hash=None):
     """
     Заменяет все пустые строки в файле на заданную строку S.
     Версия 3: Расширенная с дополнительными параметрами.
@@ -134,6 +439,12 @@ def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_white
     replacement_string (str): строка S для замены пустых строк
     keep_whitespace_only (bool): если True, строки, содержащие только пробелы,
                                  не считаются пустыми и не заменяются
+    analysis (dict): если передан, заполняется анализом файла после замены
+                     (как analyze_file_empty_lines), без повторного чтения
+    pending_replacements (list): если передан, замена исходного файла откладывается
+                                 до commit_replacements (общая синхронизация каталогов)
+    content_hash: объект hashlib; если передан, обновляется содержимым файла
+                  после замены (вычисляется при записи, без повторного чтения)
     
     Возвращает:
     tuple: (success, empty_lines_count, total_lines)
@@ -141,6 +452,9 @@ def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_white
     success = False
     empty_lines_count = 0
     total_lines = 0
+    # Строки из пробелов, оставленные при keep_whitespace_only
+    kept_empty_count = 0
+    temp_path = None
     
     try:
         # Проверка существования файла
@@ -157,6 +471,13 @@ def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_white
         print(f"Файл: {file_path}")
         print(f"Размер: {file_stats.st_size} байт")
         
+        # Файл без пустых строк не читаем в память
+        file_info = {}
+        if not file_needs_rewrite(file_path, check_line_endings=False, file_info=file_info,
+                                  content_hash=content_hash):
+            _skip_unchanged_file(file_path, replacement_string, analysis, file_info['total_lines'])
+            return (True, 0, file_info['total_lines'])
+        
         # Читаем и обрабатываем файл
         lines = []
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -176,26 +497,249 @@ def replace_empty_lines_with_string_v3(file_path, replacement_string, keep_white
                     lines.append(replacement_string + '\n')
                     empty_lines_count += 1
                 else:
+                    if line.strip() == '':
+                        kept_empty_count += 1
                     lines.append(line)
         
         # Записываем обратно только если были изменения
         if empty_lines_count > 0:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.writelines(lines)
+            with _create_temp_file(file_path, 'w', content_hash=content_hash,
+                                   encoding='utf-8') as temp_file:
+                temp_path = temp_file.name
+                temp_file.writelines(lines)
+            _replace_atomically(temp_path, file_path, pending_replacements)
+        elif content_hash is not None:
+            # Файл не изменился, но при проверке не был признан чистым (есть '\r')
+            _update_hash_from_file(content_hash, file_path)
+        
+        if analysis is not None:
+            analysis.update(_analysis_after_replacement(
+                total_lines, empty_lines_count, kept_empty_count, replacement_string))
         
         success = True
         
     except PermissionError:
         print(f"Ошибка: недостаточно прав для записи в файл '{file_path}'")
+        _remove_temp_file(temp_path)
     except UnicodeDecodeError:
         print(f"Ошибка: не удается декодировать файл '{file_path}' как UTF-8")
-        print("Попробуйте указать другую кодировку.")
+        print("Для файлов в других кодировках используйте версию 4 с параметром encoding.")
     except Exception as e:
         print(f"Неизвестная ошибка: {type(e).__name__}: {e}")
+        _remove_temp_file(temp_path)
     
     return (success, empty_lines_count, total_lines)
 
 
+def file_needs_rewrite(file_path, check_line_endings=True, encoding='utf-8', file_info=None,
+                       content_hash=None):
+    """
+    Быстро проверяет, изменит ли замена пустых строк файл.
+    
+    Файл отображается в память (mmap) и просматривается регулярным
+    выражением без копирования и декодирования. Проверка консервативная:
+    при наличии '\r' файл всегда считается требующим перезаписи.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    check_line_endings (bool): учитывать, что версии 1, 2 и 4 приводят
+                               переводы строк к os.linesep
+    encoding (str): ASCII-совместимая кодировка файла
+    file_info (dict): если передан и файл не изменится, в него записывается
+                      количество строк ('total_lines'), подсчитанное в том же
+                      проходе, чтобы не читать файл повторно
+    content_hash: объект hashlib; если файл не изменится, обновляется его содержимым
+    
+    Возвращает:
+    bool: False, если файл точно не изменится
+    """
+    first_line_pattern, inner_line_pattern = _empty_line_patterns(encoding)[3:]
+    
+    if os.path.getsize(file_path) == 0:
+        if file_info is not None:
+            file_info['total_lines'] = 0
+        return False
+    
+    with open(file_path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data.find(b'\r') != -1:
+            return True
+        if check_line_endings and os.linesep != '\n':
+            return True
+        
+        if (first_line_pattern.match(data) is not None
+                or inner_line_pattern.search(data) is not None):
+            return True
+        
+        if file_info is not None:
+            # Последняя строка без перевода строки тоже считается
+            # (mmap не поддерживает count, поэтому считаем по блокам)
+            newlines = sum(data[start:start + CHUNK_SIZE].count(b'\n')
+                           for start in range(0, len(data), CHUNK_SIZE))
+            file_info['total_lines'] = newlines + (data[-1:] != b'\n')
+        
+        if content_hash is not None:
+            content_hash.update(data)
+        
+        return False
+
+
+def _skip_unchanged_file(file_path, replacement_string, analysis, total_lines):
+    """
+    Сообщает, что файл не требует замены, и заполняет analysis.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    replacement_string (str): строка замены
+    analysis (dict): анализ файла после замены или None
+    total_lines (int): количество строк файла (из file_needs_rewrite)
+    """
+    if analysis is not None:
+        analysis.update(_analysis_after_replacement(
+            total_lines, 0, 0, replacement_string))
+    
+    print(f"Пустых строк нет, файл '{file_path}' не изменен")
+
+
+def _count_empty_lines(data, replacement, encoding='utf-8'):
+    """
+    Заменяет пустые строки в блоке из целых строк (каждая оканчивается '\n').
+    
+    Параметры:
+    data (bytes): блок строк
+    replacement (bytes): замена пустой строки (без '\n')
+    encoding (str): ASCII-совместимая кодировка блока
+    
+    Возвращает:
+    tuple: (новый блок, количество замен)
+    """
+    empty_pattern, fast_pattern, prefixes = _empty_line_patterns(encoding)[:3]
+    
+    pattern = fast_pattern
+    if any(prefix in data for prefix in prefixes):
+        pattern = empty_pattern
+    
+    # Ведущий '\n' позволяет найти пустую первую строку блока
+    data, count = pattern.subn(b'\n' + replacement, b'\n' + data)
+    return data[1:], count
+
+
+def replace_empty_lines_with_string_v4(file_path, replacement_string, chunk_size=CHUNK_SIZE,
+                                       analysis=None, encoding='utf-8', pending_replacements=None,
+                                       content_hash=None):
+    """
+    Заменяет все пустые строки в файле на заданную строку S.
+    Версия 4: Потоковая обработка байтов большими блоками.
+    
+    Файл читается блоками по chunk_size байт без декодирования, пустые
+    строки находятся скомпилированным регулярным выражением. Результат
+    совпадает с версиями 1 и 2 байт в байт (переводы строк '\\r\\n' и '\\r'
+    так же приводятся к '\\n').
+    
+    Так как файл не декодируется, обрабатываются файлы в любой ASCII-совместимой
+    кодировке (cp1251, koi8-r, latin-1 и т.п.); строка S записывается в ней же.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    replacement_string (str): строка S для замены пустых строк
+    chunk_size (int): размер блока чтения в байтах
+    analysis (dict): если передан, заполняется анализом файла после замены
+                     (как analyze_file_empty_lines), без повторного чтения
+    encoding (str): кодировка файла
+    pending_replacements (list): если передан, замена исходного файла откладывается
+                                 до commit_replacements (общая синхронизация каталогов)
+    content_hash: объект hashlib; если передан, обновляется содержимым файла
+                  после замены (вычисляется при записи, без повторного чтения)
+    
+    Возвращает:
+    bool: True, если операция успешна, иначе False
+    """
+    temp_path = None
+    
+    try:
+        if not os.path.exists(file_path):
+            print(f"Ошибка: файл '{file_path}' не найден")
+            return False
+        
+        if not os.path.isfile(file_path):
+            print(f"Ошибка: '{file_path}' не является файлом")
+            return False
+        
+        # Файл без пустых строк не перезаписываем
+        file_info = {}
+        if not file_needs_rewrite(file_path, encoding=encoding, file_info=file_info,
+                                  content_hash=content_hash):
+            _skip_unchanged_file(file_path, replacement_string, analysis, file_info['total_lines'])
+            return True
+        
+        replacement = replacement_string.encode(encoding)
+        newline = os.linesep.encode('ascii')
+        empty_lines_count = 0
+        total_lines = 0
+        
+        with open(file_path, 'rb') as source_file, \
+                _create_temp_file(file_path, 'wb', content_hash=content_hash,
+                                  buffering=max(chunk_size, io.DEFAULT_BUFFER_SIZE)) as temp_file:
+            temp_path = temp_file.name
+            tail = b''
+            
+            while True:
+                chunk = source_file.read(chunk_size)
+                
+                if chunk:
+                    data = tail + chunk
+                    tail = b''
+                    # '\r' в конце блока может оказаться началом '\r\n'
+                    if data.endswith(b'\r'):
+                        data, tail = data[:-1], b'\r'
+                else:
+                    data, tail = tail, b''
+                
+                # Переводы строк приводим к '\n', как при чтении в текстовом режиме
+                if b'\r' in data:
+                    data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+                
+                if chunk:
+                    # Неполная последняя строка переходит в следующий блок
+                    cut = data.rfind(b'\n') + 1
+                    data, tail = data[:cut], data[cut:] + tail
+                elif data and not data.endswith(b'\n'):
+                    # Последняя строка файла без перевода строки
+                    total_lines += 1
+                    if _count_empty_lines(data + b'\n', b'', encoding)[1]:
+                        data += b'\n'
+                        total_lines -= 1
+                
+                total_lines += data.count(b'\n')
+                data, count = _count_empty_lines(data, replacement, encoding)
+                empty_lines_count += count
+                
+                if newline != b'\n':
+                    data = data.replace(b'\n', newline)
+                temp_file.write(data)
+                
+                if not chunk:
+                    break
+        
+        _replace_atomically(temp_path, file_path, pending_replacements)
+        
+        if analysis is not None:
+            analysis.update(_analysis_after_replacement(
+                total_lines, empty_lines_count, 0, replacement_string))
+        
+        print(f"Успешно заменено {empty_lines_count} пустых строк на '{replacement_string}'")
+        return True
+    
+    except PermissionError:
+        print(f"Ошибка: недостаточно прав для работы с файлом '{file_path}'")
+        _remove_temp_file(temp_path)
+        return False
+    except Exception as e:
+        print(f"Неизвестная ошибка: {e}")
+        _remove_temp_file(temp_path)
+        return False
+
+
 def create_test_file(file_path, content_lines):
     """
     Создает тестовый файл с заданным содержимым.
@@ -215,13 +759,81 @@ def create_test_file(file_path, content_lines):
         return False
 
 
-def display_file_content(file_path, max_lines=20):
+def collect_file_stats(file_path, preview_lines=20, encoding='utf-8'):
+    """
+    Собирает статистику файла за один проход.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    preview_lines (int): сколько первых строк сохранить для просмотра
+    encoding (str): кодировка файла
+    
+    Возвращает:
+    dict: статистика файла
+      size: размер в байтах
+      total_lines: количество строк
+      empty_lines: пустые строки, включая строки из пробелов (strip() == '')
+      blank_lines: строки без единого символа
+      whitespace_only_lines: строки, состоящие только из пробельных символов
+      line_endings: 'LF', 'CRLF', 'CR', 'mixed' или None (нет переводов строк)
+      preview: первые preview_lines строк без символов перевода строки
+    """
+    stats = {
+        'size': os.path.getsize(file_path),
+        'total_lines': 0,
+        'empty_lines': 0,
+        'blank_lines': 0,
+        'whitespace_only_lines': 0,
+        'line_endings': None,
+        'preview': []
+    }
+    endings = {'LF': 0, 'CRLF': 0, 'CR': 0}
+    
+    # newline='' сохраняет исходные переводы строк
+    with open(file_path, 'r', encoding=encoding, newline='') as file:
+        for line in file:
+            stats['total_lines'] += 1
+            
+            if line.endswith('\r\n'):
+                endings['CRLF'] += 1
+                content = line[:-2]
+            elif line.endswith('\n'):
+                endings['LF'] += 1
+                content = line[:-1]
+            elif line.endswith('\r'):
+                endings['CR'] += 1
+                content = line[:-1]
+            else:
+                content = line
+            
+            if content == '':
+                stats['blank_lines'] += 1
+            elif content.strip() == '':
+                stats['whitespace_only_lines'] += 1
+            
+            if len(stats['preview']) < preview_lines:
+                stats['preview'].append(content)
+    
+    stats['empty_lines'] = stats['blank_lines'] + stats['whitespace_only_lines']
+    
+    used_endings = [name for name, count in endings.items() if count > 0]
+    if len(used_endings) == 1:
+        stats['line_endings'] = used_endings[0]
+    elif used_endings:
+        stats['line_endings'] = 'mixed'
+    
+    return stats
+
+
+def display_file_content(file_path, max_lines=20, stats=None, encoding='utf-8'):
     """
     Отображает содержимое файла.
     
     Параметры:
     file_path (str): путь к файлу
     max_lines (int): максимальное количество строк для отображения
+    stats (dict): готовый результат collect_file_stats, чтобы не читать файл снова
+    encoding (str): кодировка файла
     """
     try:
         if not os.path.exists(file_path):
@@ -231,25 +843,25 @@ def display_file_content(file_path, max_lines=20):
         print(f"\nСодержимое файла '{file_path}':")
         print("-" * 50)
         
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            
-            if len(lines) == 0:
-                print("(файл пуст)")
-                return
-            
-            for i, line in enumerate(lines[:max_lines]):
-                line_num = i + 1
-                # Заменяем непечатаемые символы для лучшего отображения
-                display_line = line.rstrip('\n').replace('\t', '\\t').replace('\r', '\\r')
-                
-                if line.strip() == '':
-                    print(f"{line_num:3}: [ПУСТАЯ СТРОКА]")
-                else:
-                    print(f"{line_num:3}: {display_line}")
+        if stats is None:
+            stats = collect_file_stats(file_path, max_lines, encoding)
+        
+        if stats['total_lines'] == 0:
+            print("(файл пуст)")
+            return
+        
+        for i, line in enumerate(stats['preview'][:max_lines]):
+            line_num = i + 1
+            # Заменяем непечатаемые символы для лучшего отображения
+            display_line = line.replace('\t', '\\t').replace('\r', '\\r')
             
-            if len(lines) > max_lines:
-                print(f"... и еще {len(lines) - max_lines} строк")
+            if line.strip() == '':
+                print(f"{line_num:3}: [ПУСТАЯ СТРОКА]")
+            else:
+                print(f"{line_num:3}: {display_line}")
+        
+        if stats['total_lines'] > max_lines:
+            print(f"... и еще {stats['total_lines'] - max_lines} строк")
         
         print("-" * 50)
         
@@ -257,12 +869,13 @@ def display_file_content(file_path, max_lines=20):
         print(f"Ошибка при чтении файла: {e}")
 
 
-def analyze_file_empty_lines(file_path):
+def analyze_file_empty_lines(file_path, stats=None):
     """
     Анализирует файл и подсчитывает пустые строки.
     
     Параметры:
     file_path (str): путь к файлу
+    stats (dict): готовый результат collect_file_stats, чтобы не читать файл снова
     
     Возвращает:
     tuple: (total_lines, empty_lines, empty_percentage)
@@ -271,15 +884,11 @@ def analyze_file_empty_lines(file_path):
         if not os.path.exists(file_path):
             return (0, 0, 0)
         
-        total_lines = 0
-        empty_lines = 0
-        
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for line in file:
-                total_lines += 1
-                if line.strip() == '':
-                    empty_lines += 1
+        if stats is None:
+            stats = collect_file_stats(file_path, preview_lines=0)
         
+        total_lines = stats['total_lines']
+        empty_lines = stats['empty_lines']
         percentage = (empty_lines / total_lines * 100) if total_lines > 0 else 0
         
         return (total_lines, empty_lines, percentage)
@@ -320,8 +929,9 @@ def interactive_mode():
             print("1. Быстрый метод (чтение всего файла в память)")
             print("2. Безопасный метод (с временным файлом)")
             print("3. Расширенный метод")
+            print("4. Потоковый метод (для больших файлов)")
             
-            method_choice = input("Ваш выбор (1-3): ").strip()
+            method_choice = input("Ваш выбор (1-4): ").strip()
             
             print("\n" + "=" * 40)
             
@@ -335,12 +945,16 @@ def interactive_mode():
                     file_path, replacement_string, keep_whitespace)
                 if success:
                     print(f"Успешно заменено {count} из {total} строк")
+            elif method_choice == '4':
+                encoding = input("Кодировка файла (Enter - utf-8): ").strip() or 'utf-8'
+                success = replace_empty_lines_with_string_v4(file_path, replacement_string,
+                                                             encoding=encoding)
             else:
                 print("Неверный выбор метода")
                 continue
             
             if success:
-                display_file_content(file_path)
+                display_file_content(file_path, encoding=encoding if method_choice == '4' else 'utf-8')
         
         elif choice == '2':
             # Создание тестового файла
@@ -394,12 +1008,26 @@ def interactive_mode():
                 print("Ошибка: путь к файлу не может быть пустым")
                 continue
             
-            total, empty, percentage = analyze_file_empty_lines(file_path)
+            if not os.path.exists(file_path):
+                print(f"Файл '{file_path}' не найден")
+                continue
+            
+            try:
+                stats = collect_file_stats(file_path, preview_lines=0)
+            except Exception as e:
+                print(f"Ошибка при анализе файла: {e}")
+                continue
+            
+            total, empty, percentage = analyze_file_empty_lines(file_path, stats)
             
             print(f"\nАнализ файла '{file_path}':")
+            print(f"  Размер: {stats['size']} байт")
             print(f"  Всего строк: {total}")
             print(f"  Пустых строк: {empty}")
+            print(f"    из них без символов: {stats['blank_lines']}")
+            print(f"    из них только из пробелов: {stats['whitespace_only_lines']}")
             print(f"  Процент пустых строк: {percentage:.1f}%")
+            print(f"  Переводы строк: {stats['line_endings'] or 'нет'}")
             
             if empty > 0:
                 print(f"\nРекомендация: можно заменить {empty} пустых строк")
@@ -412,70 +1040,601 @@ def interactive_mode():
             print("Неверный выбор. Попробуйте снова.")
 
 
-def batch_process_files(file_paths, replacement_string, method='v1'):
+def _process_single_file(file_path, replacement_string, method, encoding='utf-8',
+                         defer_replacement=False, hash_content=False):
+    """
+    Обрабатывает один файл для batch_process_files.
+    
+    Анализ файла после замены вычисляется в том же проходе,
+    что и замена, поэтому файл читается один раз.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    replacement_string (str): строка для замены
+    method (str): метод обработки ('v1', 'v2', 'v3', 'v4')
+    encoding (str): кодировка файла (кроме UTF-8 поддерживается только методом 'v4')
+    defer_replacement (bool): если True, исходный файл не заменяется, а пары
+                              (временный файл, файл) возвращаются в ключе
+                              'pending_replacements' для commit_replacements
+    hash_content (bool): если True, SHA-256 содержимого файла после замены
+                         (вычисленный при записи) возвращается в ключе 'content_hash'
+    
+    Возвращает:
+    dict: результат обработки файла
+    """
+    analysis = {}
+    pending = [] if defer_replacement else None
+    content_hash = hashlib.sha256() if hash_content else None
+    
+    try:
+        if method != 'v4' and codecs.lookup(encoding).name != 'utf-8':
+            raise ValueError(f"кодировка '{encoding}' поддерживается только методом 'v4'")
+        
+        if method == 'v1':
+            success = replace_empty_lines_with_string_v1(file_path, replacement_string, analysis=analysis,
+                                                         pending_replacements=pending,
+                                                         content_hash=content_hash)
+            result = {'success': success}
+        elif method == 'v2':
+            success = replace_empty_lines_with_string_v2(file_path, replacement_string, analysis=analysis,
+                                                         pending_replacements=pending,
+                                                         content_hash=content_hash)
+            result = {'success': success}
+        elif method == 'v3':
+            success, count, total = replace_empty_lines_with_string_v3(
+                file_path, replacement_string, analysis=analysis, pending_replacements=pending,
+                content_hash=content_hash)
+            result = {
+                'success': success,
+                'replaced': count,
+                'total': total
+            }
+        elif method == 'v4':
+            success = replace_empty_lines_with_string_v4(file_path, replacement_string, analysis=analysis,
+                                                         encoding=encoding, pending_replacements=pending,
+                                                         content_hash=content_hash)
+            result = {'success': success}
+        else:
+            raise ValueError(f"неизвестный метод '{method}'")
+        
+        if result['success']:
+            result['after_analysis'] = analysis
+            if content_hash is not None:
+                result['content_hash'] = content_hash.hexdigest()
+        if pending:
+            result['pending_replacements'] = pending
+    
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    return result
+
+
+def _file_content_hash(file_path):
+    """
+    Вычисляет хеш содержимого файла (SHA-256), читая файл блоками.
+    
+    Параметры:
+    file_path (str): путь к файлу
+    
+    Возвращает:
+    str: шестнадцатеричный хеш
+    """
+    # hashlib.file_digest появился только в Python 3.11
+    if not hasattr(hashlib, 'file_digest'):
+        content_hash = hashlib.sha256()
+        _update_hash_from_file(content_hash, file_path)
+        return content_hash.hexdigest()
+    
+    with open(file_path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()
+
+
+def load_manifest(manifest_path):
+    """
+    Загружает манифест пакетной обработки.
+    
+    Манифест хранит для каждого обработанного файла его размер, время изменения,
+    хеш содержимого после обработки и результат последней обработки.
+    
+    Параметры:
+    manifest_path (str): путь к файлу манифеста (JSON)
+    
+    Возвращает:
+    dict: {абсолютный путь: запись}; пустой словарь, если манифеста нет или он поврежден
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Предупреждение: манифест '{manifest_path}' не прочитан ({e}), обрабатываются все файлы")
+        return {}
+    
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(manifest, manifest_path):
+    """
+    Сохраняет манифест пакетной обработки (через временный файл в том же каталоге).
+    
+    Параметры:
+    manifest (dict): манифест
+    manifest_path (str): путь к файлу манифеста
+    """
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, manifest_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _manifest_entry_is_current(entry, file_path, replacement_string, method, encoding):
+    """
+    Проверяет, что файл не изменился с момента записи в манифест.
+    
+    Если размер и время изменения совпадают, файл не открывается. Если совпадает
+    только размер (например, файл скопирован заново), сравнивается хеш содержимого.
+    
+    Параметры:
+    entry (dict): запись манифеста или None
+    file_path (str): путь к файлу
+    replacement_string (str): строка для замены
+    method (str): метод обработки
+    encoding (str): кодировка файла
+    
+    Возвращает:
+    bool: True, если файл можно пропустить
+    """
+    if (entry is None or entry.get('replacement') != replacement_string
+            or entry.get('method') != method or entry.get('encoding', 'utf-8') != encoding):
+        return False
+    
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    
+    if stat.st_size != entry['size']:
+        return False
+    if stat.st_mtime_ns == entry['mtime_ns']:
+        return True
+    
+    if _file_content_hash(file_path) != entry['hash']:
+        return False
+    
+    # Содержимое то же, запоминаем новое время изменения
+    entry['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def _manifest_entry(file_path, replacement_string, method, encoding, result):
+    """
+    Создает запись манифеста для только что обработанного файла.
+    
+    Параметры:
+    result (dict): результат обработки; ключ 'content_hash' (хеш, вычисленный
+                   при записи) переносится из него в запись манифеста
+    
+    Возвращает:
+    dict: запись манифеста
+    """
+    stat = os.stat(file_path)
+    
+    # Хеш вычислен при записи файла (_process_single_file с hash_content=True)
+    content_hash = result.pop('content_hash', None)
+    if content_hash is None:
+        content_hash = _file_content_hash(file_path)
+    
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': content_hash,
+        'replacement': replacement_string,
+        'method': method,
+        'encoding': encoding,
+        'result': result
+    }
+
+
+def batch_process_files(file_paths, replacement_string, method='v1', workers=1, use_processes=False,
+                        manifest_path=None, force=False, encoding='utf-8', sync_every=100):
     """
     Пакетная обработка нескольких файлов.
     
     Параметры:
     file_paths (list): список путей к файлам
     replacement_string (str): строка для замены
-    method (str): метод обработки ('v1', 'v2', 'v3')
+    method (str): метод обработки ('v1', 'v2', 'v3', 'v4')
+    workers (int): количество параллельных обработчиков (1 - последовательно)
+    use_processes (bool): если True, используются процессы, иначе потоки
+    manifest_path (str): путь к манифесту; файлы, не изменившиеся с прошлого
+                         запуска, пропускаются без открытия
+    force (bool): если True, манифест не используется для пропуска и все
+                  файлы обрабатываются заново (манифест обновляется)
+    encoding (str): кодировка файлов (кроме UTF-8 поддерживается только методом 'v4')
+    sync_every (int): сколько файлов заменять с одной синхронизацией каталогов;
+                      временные копии одновременно существуют только для них
     
     Возвращает:
     dict: словарь с результатами обработки каждого файла
     """
+    if sync_every < 1:
+        raise ValueError("sync_every должно быть положительным")
+    
     results = {}
     
     print(f"\nПакетная обработка {len(file_paths)} файлов...")
     print(f"Строка замены: '{replacement_string}'")
     print("=" * 50)
     
-    for i, file_path in enumerate(file_paths, 1):
-        print(f"\n{i}. Обработка файла: {file_path}")
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    
+    # Файлы, не изменившиеся с прошлого запуска, не обрабатываем
+    pending_paths = []
+    for file_path in file_paths:
+        entry = manifest.get(os.path.abspath(file_path))
+        if (not force and manifest_path
+                and _manifest_entry_is_current(entry, file_path, replacement_string, method,
+                                               encoding)):
+            results[file_path] = dict(entry['result'], skipped=True)
+        elif file_path not in pending_paths:
+            pending_paths.append(file_path)
+    
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor_class = (concurrent.futures.ProcessPoolExecutor if use_processes
+                              else concurrent.futures.ThreadPoolExecutor)
+            executor = stack.enter_context(executor_class(max_workers=workers))
         
-        try:
-            if method == 'v1':
-                success = replace_empty_lines_with_string_v1(file_path, replacement_string)
-                results[file_path] = {'success': success}
-            elif method == 'v2':
-                success = replace_empty_lines_with_string_v2(file_path, replacement_string)
-                results[file_path] = {'success': success}
-            elif method == 'v3':
-                success, count, total = replace_empty_lines_with_string_v3(
-                    file_path, replacement_string)
-                results[file_path] = {
-                    'success': success,
-                    'replaced': count,
-                    'total': total
-                }
+        # Файлы обрабатываются группами по sync_every: измененные файлы группы
+        # заменяются с одной синхронизацией каталогов до перехода к следующей
+        for group_start in range(0, len(file_paths), sync_every):
+            group = file_paths[group_start:group_start + sync_every]
+            
+            if executor is not None:
+                group_pending = [file_path for file_path in dict.fromkeys(group)
+                                 if file_path not in results]
+                file_results = executor.map(_process_single_file, group_pending,
+                                            [replacement_string] * len(group_pending),
+                                            [method] * len(group_pending),
+                                            [encoding] * len(group_pending),
+                                            [True] * len(group_pending),
+                                            [manifest_path is not None] * len(group_pending))
+                results.update(zip(group_pending, file_results))
             
-            if results[file_path].get('success', False):
-                # Анализируем результат
-                total, empty, percentage = analyze_file_empty_lines(file_path)
-                results[file_path]['after_analysis'] = {
-                    'total': total,
-                    'empty': empty,
-                    'percentage': percentage
-                }
+            pending_replacements = []
+            
+            for i, file_path in enumerate(group, group_start + 1):
+                print(f"\n{i}. Обработка файла: {file_path}")
                 
-                if empty == 0:
-                    print(f"  ✓ В файле больше нет пустых строк")
-                else:
-                    print(f"  ⚠ В файле осталось {empty} пустых строк ({percentage:.1f}%)")
+                if file_path not in results:
+                    results[file_path] = _process_single_file(file_path, replacement_string, method,
+                                                              encoding, defer_replacement=True,
+                                                              hash_content=manifest_path is not None)
+                
+                result = results[file_path]
+                pending_replacements.extend(result.pop('pending_replacements', []))
+                
+                if result.get('skipped'):
+                    print(f"  ↷ Файл не изменился с прошлого запуска, пропущен")
+                elif 'error' in result:
+                    print(f"  ✗ Ошибка: {result['error']}")
+                elif result['success']:
+                    empty = result['after_analysis']['empty']
+                    percentage = result['after_analysis']['percentage']
+                    
+                    if empty == 0:
+                        print(f"  ✓ В файле больше нет пустых строк")
+                    else:
+                        print(f"  ⚠ В файле осталось {empty} пустых строк ({percentage:.1f}%)")
+            
+            for file_path, error in commit_replacements(pending_replacements).items():
+                results[file_path] = {'success': False, 'error': error}
+                print(f"\n✗ Ошибка замены файла {file_path}: {error}")
+    
+    # Результаты в порядке входного списка
+    results = {file_path: results[file_path] for file_path in file_paths}
+    
+    if manifest_path:
+        for file_path in pending_paths:
+            key = os.path.abspath(file_path)
+            if results[file_path]['success']:
+                try:
+                    manifest[key] = _manifest_entry(file_path, replacement_string, method, encoding,
+                                                    results[file_path])
+                except OSError:
+                    manifest.pop(key, None)
+            else:
+                manifest.pop(key, None)
         
-        except Exception as e:
-            print(f"  ✗ Ошибка: {e}")
-            results[file_path] = {'success': False, 'error': str(e)}
+        save_manifest(manifest, manifest_path)
     
     # Сводка результатов
     print("\n" + "=" * 50)
     print("СВОДКА РЕЗУЛЬТАТОВ:")
     successful = sum(1 for r in results.values() if r.get('success', False))
     print(f"Успешно обработано: {successful}/{len(file_paths)}")
+    if manifest_path:
+        skipped = sum(1 for r in results.values() if r.get('skipped'))
+        print(f"Пропущено без изменений: {skipped}")
     
     return results
 
 
+async def batch_process_files_async(file_paths, replacement_string, method='v1', max_concurrency=64,
+                                    encoding='utf-8'):
+    """
+    Асинхронная пакетная обработка нескольких файлов.
+    
+    Открытие, чтение и запись файлов выполняются в пуле потоков, поэтому
+    ожидание ввода-вывода (например, на сетевом диске) по разным файлам
+    перекрывается. Одновременно обрабатывается не более max_concurrency файлов.
+    
+    Параметры:
+    file_paths (list): список путей к файлам
+    replacement_string (str): строка для замены
+    method (str): метод обработки ('v1', 'v2', 'v3', 'v4')
+    max_concurrency (int): максимальное количество одновременно обрабатываемых файлов
+    encoding (str): кодировка файлов (кроме UTF-8 поддерживается только методом 'v4')
+    
+    Возвращает:
+    асинхронный генератор пар (file_path, result) в порядке завершения обработки,
+    result - словарь как в batch_process_files
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency должно быть положительным")
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+    
+    async def process(file_path):
+        async with semaphore:
+            result = await loop.run_in_executor(
+                executor, _process_single_file, file_path, replacement_string, method, encoding)
+        return file_path, result
+    
+    tasks = [asyncio.ensure_future(process(file_path)) for file_path in file_paths]
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Если потребитель прервал перебор, не запускаем оставшиеся файлы
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def expand_input_paths(patterns, include='*'):
+    """
+    Раскрывает список путей для пакетной обработки.
+    
+    Параметры:
+    patterns (list): пути к файлам, шаблоны glob (поддерживается '**')
+                     и каталоги (обходятся рекурсивно)
+    include (str): шаблон имен файлов, отбираемых при обходе каталогов
+    
+    Возвращает:
+    list: пути к файлам без повторов, в порядке появления
+    (символическая ссылка и ее цель считаются одним файлом)
+    """
+    file_paths = []
+    seen = set()
+    
+    def add(file_path):
+        # Тот же путь, что заменяет _create_temp_file: иначе файл,
+        # доступный по ссылке, переписывался бы дважды за одну пачку
+        key = os.path.realpath(file_path)
+        if key not in seen:
+            seen.add(key)
+            file_paths.append(file_path)
+    
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if fnmatch.fnmatch(name, include):
+                        add(os.path.join(root, name))
+        elif os.path.isfile(pattern):
+            add(pattern)
+        else:
+            matches = sorted(path for path in glob.glob(pattern, recursive=True)
+                             if os.path.isfile(path))
+            if not matches:
+                print(f"Предупреждение: по шаблону '{pattern}' файлы не найдены", file=sys.stderr)
+            for path in matches:
+                add(path)
+    
+    return file_paths
+
+
+def _percentile(sorted_values, percent):
+    """
+    Возвращает процентиль отсортированного списка (метод ближайшего ранга).
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _timed_process_file(file_path, replacement_string, method, encoding, hash_content=False):
+    """
+    Обрабатывает файл для командной строки и замеряет время обработки.
+    Замена файла откладывается до commit_replacements.
+    
+    Возвращает:
+    dict: результат _process_single_file с ключами 'seconds' и 'bytes'
+    """
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        size = 0
+    
+    result = _process_single_file(file_path, replacement_string, method, encoding,
+                                  defer_replacement=True, hash_content=hash_content)
+    result['seconds'] = time.perf_counter() - start
+    result['bytes'] = size
+    return result
+
+
+def run_cli(argv=None):
+    """
+    Неинтерактивная пакетная замена пустых строк из командной строки.
+    
+    Результат обработки каждого файла выводится строкой JSON (JSONL) по мере
+    готовности, в конце - строка со сводкой: пропускная способность
+    (файлов/с, МБ/с) и процентили времени обработки одного файла.
+    Сообщения функций замены выводятся в stderr.
+    
+    Параметры:
+    argv (list): аргументы командной строки (по умолчанию sys.argv[1:])
+    
+    Возвращает:
+    int: код завершения (0 - все файлы обработаны успешно)
+    """
+    parser = argparse.ArgumentParser(
+        description="Замена пустых строк в файлах на строку S")
+    parser.add_argument('paths', nargs='+',
+                        help="файлы, шаблоны glob ('logs/**/*.log') или каталоги")
+    parser.add_argument('-s', '--replacement', required=True, help="строка S для замены")
+    parser.add_argument('-m', '--method', choices=['v1', 'v2', 'v3', 'v4'], default='v4',
+                        help="метод обработки (по умолчанию v4)")
+    parser.add_argument('-e', '--encoding', default='utf-8', help="кодировка файлов")
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help="количество потоков обработки")
+    parser.add_argument('--include', default='*',
+                        help="шаблон имен файлов при обходе каталогов")
+    parser.add_argument('--manifest', help="манифест для пропуска неизмененных файлов")
+    parser.add_argument('--force', action='store_true',
+                        help="обработать все файлы, даже если они не изменились")
+    parser.add_argument('--sync-every', type=int, default=100,
+                        help="сколько файлов заменять с одной синхронизацией каталогов")
+    parser.add_argument('-o', '--output', help="файл для JSONL (по умолчанию stdout)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="не выводить сообщения обработки")
+    args = parser.parse_args(argv)
+    
+    if args.workers < 1 or args.sync_every < 1:
+        parser.error("--workers и --sync-every должны быть положительными")
+    
+    file_paths = expand_input_paths(args.paths, args.include)
+    
+    latencies = []
+    total_bytes = 0
+    counts = {'files': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0}
+    
+    with contextlib.ExitStack() as stack:
+        output = (stack.enter_context(open(args.output, 'w', encoding='utf-8'))
+                  if args.output else sys.stdout)
+        messages = (stack.enter_context(open(os.devnull, 'w'))
+                    if args.quiet else sys.stderr)
+        stack.enter_context(contextlib.redirect_stdout(messages))
+        
+        # Предупреждения о манифесте не должны попасть в поток JSONL
+        manifest = load_manifest(args.manifest) if args.manifest else {}
+        executor = stack.enter_context(
+            concurrent.futures.ThreadPoolExecutor(max_workers=args.workers))
+        
+        def emit(record):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+        
+        start = time.perf_counter()
+        
+        for group_start in range(0, len(file_paths), args.sync_every):
+            group = file_paths[group_start:group_start + args.sync_every]
+            results = {}
+            
+            for file_path in group:
+                entry = manifest.get(os.path.abspath(file_path))
+                if (args.manifest and not args.force
+                        and _manifest_entry_is_current(entry, file_path, args.replacement,
+                                                       args.method, args.encoding)):
+                    results[file_path] = dict(entry['result'], skipped=True)
+            
+            pending_paths = [file_path for file_path in group if file_path not in results]
+            futures = {executor.submit(_timed_process_file, file_path, args.replacement,
+                                       args.method, args.encoding, args.manifest is not None): file_path
+                       for file_path in pending_paths}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+            
+            # Группа файлов заменяется с одной синхронизацией каталогов
+            pending_replacements = []
+            for file_path in pending_paths:
+                pending_replacements.extend(results[file_path].pop('pending_replacements', []))
+            for file_path, error in commit_replacements(pending_replacements).items():
+                results[file_path].update(success=False, error=error)
+                results[file_path].pop('after_analysis', None)
+            
+            for file_path in group:
+                result = results[file_path]
+                counts['files'] += 1
+                
+                if result.get('skipped'):
+                    counts['skipped'] += 1
+                else:
+                    latencies.append(result['seconds'])
+                    total_bytes += result['bytes']
+                
+                if result['success']:
+                    counts['succeeded'] += 1
+                else:
+                    counts['failed'] += 1
+                
+                if args.manifest and not result.get('skipped'):
+                    key = os.path.abspath(file_path)
+                    record_result = {name: value for name, value in result.items()
+                                     if name not in ('seconds', 'bytes')}
+                    if result['success']:
+                        try:
+                            manifest[key] = _manifest_entry(file_path, args.replacement, args.method,
+                                                            args.encoding, record_result)
+                        except OSError:
+                            manifest.pop(key, None)
+                    else:
+                        manifest.pop(key, None)
+                
+                emit(dict(type='file', path=file_path, **result))
+        
+        seconds = time.perf_counter() - start
+        
+        if args.manifest:
+            save_manifest(manifest, args.manifest)
+        
+        latencies.sort()
+        summary = dict(
+            type='summary',
+            seconds=seconds,
+            files_per_second=counts['files'] / seconds if seconds > 0 else None,
+            mb_per_second=total_bytes / (1024 * 1024) / seconds if seconds > 0 else None,
+            bytes=total_bytes,
+            latency_ms={name: (_percentile(latencies, percent) * 1000 if latencies else None)
+                        for name, percent in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))},
+            **counts
+        )
+        emit(summary)
+    
+    print(f"Обработано файлов: {counts['files']} (успешно: {counts['succeeded']}, "
+          f"ошибок: {counts['failed']}, пропущено: {counts['skipped']}) "
+          f"за {seconds:.2f} с", file=sys.stderr)
+    
+    return 0 if counts['failed'] == 0 else 1
+
+
 # Примеры использования
 def demonstrate_examples():
     """
@@ -543,6 +1702,10 @@ def demonstrate_examples():
 
 # Основная программа
 if __name__ == "__main__":
+    # С аргументами - неинтерактивный режим командной строки
+    if len(sys.argv) > 1:
+        sys.exit(run_cli())
+    
     print("ПРОГРАММА ДЛЯ ЗАМЕНЫ ПУСТЫХ СТРОК В ФАЙЛЕ")
     print("=" * 60)
     
@@ -1,7 +1,25 @@
+import concurrent.futures
+import contextlib
+import io
+import json
+import math
 import os
 import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import warnings
 import numpy as np
-from typing import List, Tuple, Union
+from array import array
+from typing import Iterator, List, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:
+    # Модуль resource есть только в Unix
+    resource = None
 
 
 def create_test_matrices_file(filename: str, k: int = 5, n: int = 3, min_val: int = -10, max_val: int = 10) -> None:
@@ -46,10 +64,204 @@ def create_test_matrices_file(filename: str, k: int = 5, n: int = 3, min_val: in
         print(f"Ошибка при создании файла: {e}")
 
 
+# Начало строки заголовка матрицы в байтах
+MATRIX_HEADER = "Матрица".encode('utf-8')
+
+# Наибольшее значение int64
+INT64_MAX = 2**63 - 1
+
+
+def parse_matrix_rows(rows: List[bytes], n: int, first_line_num: int) -> np.ndarray:
+    """
+    Преобразует n строк матрицы в массив n×n одним вызовом.
+    
+    Все строки разбираются разом через numpy.fromstring. Построчная
+    проверка выполняется, только если в какой-то строке не n чисел
+    или значения слишком велики для int64.
+    
+    Параметры:
+    rows (list): строки матрицы в байтах
+    n (int): размерность матрицы
+    first_line_num (int): номер первой строки в файле
+    
+    Возвращает:
+    ndarray: матрица n×n типа int64; если сумма n ее элементов может
+    не поместиться в int64, матрица типа object из целых чисел Python
+    
+    Исключения:
+    ValueError: если строка содержит не числа или не n чисел
+    """
+    try:
+        with warnings.catch_warnings():
+            # Старые версии NumPy при нечисловых данных останавливаются
+            # с предупреждением, новые - выбрасывают ValueError
+            warnings.simplefilter('ignore', DeprecationWarning)
+            values = np.fromstring(b" ".join(rows), dtype=np.int64, sep=' ')
+    except ValueError:
+        values = None
+    
+    # fromstring молча заменяет слишком большие числа на границы int64,
+    # поэтому значения на границе диапазона перепроверяем построчно
+    limit = _int64_element_limit(n)
+    if (values is not None and values.size == n * n
+            and all(len(row_line.split()) == n for row_line in rows)
+            and (values.size == 0 or -limit < values.min() and values.max() < limit)):
+        return values.reshape(n, n)
+    
+    # Ищем некорректную строку, чтобы сообщить ее номер
+    for line_num, row_line in enumerate(rows, first_line_num):
+        row_line = row_line.strip()
+        try:
+            row = list(map(int, row_line.split()))
+        except ValueError:
+            raise ValueError(f"строка {line_num}: '{row_line.decode('utf-8', 'replace')}' "
+                             f"не является числами")
+        if len(row) != n:
+            raise ValueError(f"строка {line_num} содержит {len(row)} чисел, ожидалось {n}")
+    
+    matrix = [list(map(int, row_line.split())) for row_line in rows]
+    if all(-limit < value < limit for row in matrix for value in row):
+        return np.array(matrix, dtype=np.int64)
+    return np.array(matrix, dtype=object)
+
+
+def _int64_element_limit(n: int) -> int:
+    """Граница модуля элементов, при которой сумма n элементов не переполняет int64"""
+    return INT64_MAX // max(n, 1)
+
+
+def iter_matrix_records(filename: str, start: int = 0, end: Optional[int] = None,
+                        n: Optional[int] = None,
+                        as_array: bool = False) -> Iterator[Tuple[List[List[int]], int, int, int, int]]:
+    """
+    Потоково читает матрицы из файла вместе с их положением в файле.
+    
+    Файл читается в двоичном режиме, поэтому смещения точные
+    и по ним можно перезаписать строки матрицы на месте.
+    
+    Параметры:
+    filename (str): имя файла
+    start (int): смещение в байтах, с которого начинается чтение
+    end (int): смещение, на котором чтение заканчивается (None - до конца файла)
+    n (int): размерность матриц, если она известна заранее
+    as_array (bool): если True, матрицы возвращаются как ndarray
+    
+    Возвращает:
+    iterator: кортежи (matrix, diag_sum, line_num, rows_start, rows_end)
+      matrix: очередная матрица n×n
+      diag_sum: сумма ее диагональных элементов
+      line_num: номер строки заголовка "Матрица ..." начиная от start (с 1)
+      rows_start, rows_end: границы строк матрицы в байтах
+    
+    Исключения:
+    ValueError: если файл содержит некорректную матрицу
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        line_num = 0
+        matrix_num = 0
+        offset = start
+        
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            line_num += 1
+            offset += len(line)
+            line = line.strip()
+            
+            # Пропускаем пустые строки
+            if not line:
+                continue
+            
+            # Первая строка из цифр задает размерность
+            if n is None and line.isdigit():
+                n = int(line)
+                continue
+            
+            if not line.startswith(MATRIX_HEADER):
+                continue
+            
+            matrix_num += 1
+            header_line = line_num
+            rows_start = offset
+            
+            # Если размерность не указана (файл с нечетными матрицами),
+            # берем ее по числу элементов первой строки
+            rows = []
+            if n is None:
+                row_line = f.readline()
+                if row_line:
+                    rows.append(row_line)
+                    n = len(row_line.split())
+            
+            while n is not None and len(rows) < n:
+                row_line = f.readline()
+                if not row_line:
+                    break
+                rows.append(row_line)
+            
+            line_num += len(rows)
+            offset += sum(len(row_line) for row_line in rows)
+            
+            if n is None or len(rows) != n:
+                raise ValueError(f"матрица {matrix_num} имеет неправильный размер")
+            
+            matrix = parse_matrix_rows(rows, n, header_line + 1)
+            diag_sum = int(np.trace(matrix))
+            
+            yield (matrix if as_array else matrix.tolist()), diag_sum, header_line, rows_start, offset
+
+
+def iter_matrices_from_file(filename: str) -> Iterator[Tuple[List[List[int]], int, int]]:
+    """
+    Потоково читает матрицы из файла, по одной за раз.
+    
+    В памяти одновременно находится только текущая матрица, поэтому
+    файл может содержать сколько угодно матриц.
+    
+    Параметры:
+    filename (str): имя файла
+    
+    Возвращает:
+    iterator: кортежи (matrix, diag_sum, line_num)
+      matrix: очередная матрица n×n
+      diag_sum: сумма ее диагональных элементов
+      line_num: номер строки заголовка "Матрица ..." в файле (с 1)
+    
+    Исключения:
+    ValueError: если файл содержит некорректную матрицу
+    """
+    for matrix, diag_sum, line_num, _, _ in iter_matrix_records(filename):
+        yield matrix, diag_sum, line_num
+
+
+def read_matrix_dimension(filename: str) -> Optional[int]:
+    """
+    Читает размерность матриц n из начала файла.
+    
+    Параметры:
+    filename (str): имя файла
+    
+    Возвращает:
+    int или None: размерность, если она указана до первой матрицы
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.isdigit():
+                return int(line)
+            if line.startswith("Матрица"):
+                return None
+    return None
+
+
 def parse_matrices_from_file(filename: str) -> Tuple[List[List[List[int]]], int, List[int]]:
     """
     Читает матрицы из файла.
     
+    Загружает все матрицы в память; для больших файлов используйте
+    iter_matrices_from_file.
+    
     Параметры:
     filename (str): имя файла
     
@@ -61,117 +273,916 @@ def parse_matrices_from_file(filename: str) -> Tuple[List[List[List[int]]], int,
     """
     matrices = []
     diag_sums = []
-    n = None
     
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        for matrix, diag_sum, _ in iter_matrices_from_file(filename):
+            matrices.append(matrix)
+            diag_sums.append(diag_sum)
         
-        i = 0
-        matrix_num = 0
+        n = read_matrix_dimension(filename)
+        if n is None and matrices:
+            n = len(matrices[0])
+        
+        return matrices, n, diag_sums
+    
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return [], 0, []
+    except Exception as e:
+        print(f"Ошибка при чтении файла: {e}")
+        return [], 0, []
+
+
+def _write_with_header(filename: str, header: str, body_file) -> None:
+    """
+    Записывает в файл заголовок, а затем содержимое временного файла.
+    
+    Параметры:
+    filename (str): имя результирующего файла
+    header (str): заголовок
+    body_file: открытый временный файл с телом
+    """
+    body_file.seek(0)
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(header)
+        shutil.copyfileobj(body_file, f)
+
+
+def calculate_diagonal_sum(matrix: List[List[int]]) -> int:
+    """
+    Вычисляет сумму диагональных элементов матрицы.
+    
+    Параметры:
+    matrix (list): матрица n×n
+    
+    Возвращает:
+    int: сумма диагональных элементов
+    """
+    n = len(matrix)
+    return sum(matrix[i][i] for i in range(n))
+
+
+def transpose_matrix(matrix: List[List[int]]) -> List[List[int]]:
+    """
+    Транспонирует матрицу.
+    
+    Параметры:
+    matrix (list): исходная матрица n×n
+    
+    Возвращает:
+    list: транспонированная матрица
+    """
+    n = len(matrix)
+    transposed = [[0] * n for _ in range(n)]
+    
+    for i in range(n):
+        for j in range(n):
+            transposed[i][j] = matrix[j][i]
+    
+    return transposed
+
+
+def transpose_matrix_inplace(matrix: Union[List[List[int]], np.ndarray, memoryview],
+                             tile_size: int = 64) -> Union[List[List[int]], np.ndarray, memoryview]:
+    """
+    Транспонирует квадратную матрицу на месте, обходя ее плитками.
+    
+    Элементы меняются местами блоками tile_size×tile_size, поэтому обе
+    плитки пары остаются в кэше, а вторая копия матрицы не создается.
+    Поддерживаются список списков, ndarray n×n и буферы (memoryview,
+    одномерный ndarray) из n² элементов.
+    
+    Параметры:
+    matrix: матрица n×n
+    tile_size (int): размер плитки
+    
+    Возвращает:
+    тот же объект matrix, транспонированный
+    
+    Исключения:
+    ValueError: если матрица не квадратная
+    """
+    if isinstance(matrix, list):
+        n = len(matrix)
+        if any(len(row) != n for row in matrix):
+            raise ValueError(f"матрица из {n} строк не является квадратной")
         
-        while i < len(lines):
-            line = lines[i].strip()
+        for bi in range(0, n, tile_size):
+            for bj in range(bi, n, tile_size):
+                for i in range(bi, min(bi + tile_size, n)):
+                    row = matrix[i]
+                    # На диагональной плитке меняем только элементы выше диагонали
+                    for j in range(max(bj, i + 1), min(bj + tile_size, n)):
+                        row[j], matrix[j][i] = matrix[j][i], row[j]
+        return matrix
+    
+    # Для буферов np.asarray возвращает представление без копирования
+    a = np.asarray(matrix)
+    if a.ndim == 1:
+        n = math.isqrt(a.size)
+        if n * n != a.size:
+            raise ValueError(f"буфер из {a.size} элементов не является квадратной матрицей")
+        a = a.reshape(n, n)
+    
+    if a.ndim != 2 or a.shape[0] != a.shape[1]:
+        raise ValueError(f"матрица формы {a.shape} не является квадратной")
+    
+    n = a.shape[0]
+    for bi in range(0, n, tile_size):
+        be = min(bi + tile_size, n)
+        a[bi:be, bi:be] = a[bi:be, bi:be].T.copy()
+        
+        for bj in range(be, n, tile_size):
+            bje = min(bj + tile_size, n)
+            upper = a[bi:be, bj:bje].copy()
+            a[bi:be, bj:bje] = a[bj:bje, bi:be].T
+            a[bj:bje, bi:be] = upper.T
+    
+    return matrix
+
+
+def process_matrices_v1(input_filename: str, output_filename: str) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы из файла (версия 1).
+    
+    Матрицы читаются потоково, поэтому потребление памяти не зависит
+    от количества матриц в файле.
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    output_filename (str): имя файла для матриц с нечетными суммами
+    
+    Возвращает:
+    tuple: (success, stats)
+    """
+    stats = {
+        'total_matrices': 0,
+        'odd_sum_matrices': 0,
+        'transposed_matrices': 0,
+        'matrices_with_even_sum': 0
+    }
+    temp_path = None
+    
+    try:
+        n = read_matrix_dimension(input_filename)
+        
+        if not n:
+            print("Ошибка: не удалось прочитать матрицы из файла")
+            return False, stats
+        
+        input_dir = os.path.dirname(os.path.abspath(input_filename))
+        
+        # Тело файла с нечетными матрицами пишем во временный файл,
+        # так как заголовок содержит их количество
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as odd_body, \
+                tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=input_dir,
+                                            delete=False, suffix='.tmp') as f_in:
+            temp_path = f_in.name
+            # Записываем размерность
+            f_in.write(f"{n}\n\n")
             
-            # Пропускаем пустые строки
-            if not line:
-                i += 1
-                continue
+            for i, (matrix, diag_sum, _) in enumerate(iter_matrices_from_file(input_filename), 1):
+                stats['total_matrices'] += 1
+                
+                if diag_sum % 2 == 1:  # Нечетная сумма
+                    stats['odd_sum_matrices'] += 1
+                    odd_body.write(f"Матрица {stats['odd_sum_matrices']} (сумма диагонали: {diag_sum}):\n")
+                    for row in matrix:
+                        row_str = " ".join(f"{val:4}" for val in row)
+                        odd_body.write(row_str + "\n")
+                    odd_body.write("\n")
+                    
+                    # Транспонируем матрицу с нечетной суммой
+                    matrix = transpose_matrix_inplace(matrix)
+                    stats['transposed_matrices'] += 1
+                else:
+                    stats['matrices_with_even_sum'] += 1
+                
+                f_in.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
+                for row in matrix:
+                    row_str = " ".join(f"{val:4}" for val in row)
+                    f_in.write(row_str + "\n")
+                f_in.write("\n")
             
-            # Если это первая строка файла, читаем размерность
-            if n is None and line.isdigit():
-                n = int(line)
-                i += 1
-                continue
+            # Записываем матрицы с нечетными суммами в отдельный файл
+            header = (f"Матрицы с нечетной суммой диагональных элементов:\n"
+                      f"Всего матриц: {stats['odd_sum_matrices']}\n\n")
+            _write_with_header(output_filename, header, odd_body)
+        
+        # Заменяем исходный файл обновленным
+        shutil.copymode(input_filename, temp_path)
+        os.replace(temp_path, input_filename)
+        
+        return True, stats
+    
+    except Exception as e:
+        print(f"Ошибка при обработке файлов: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, stats
+
+
+def process_matrices_v2(input_filename: str, output_filename: str) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы из файла (версия 2, более эффективная).
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    output_filename (str): имя файла для матриц с нечетными суммами
+    
+    Возвращает:
+    tuple: (success, stats)
+    """
+    stats = {
+        'total_matrices': 0,
+        'odd_sum_matrices': 0,
+        'transposed_matrices': 0,
+        'even_sum_matrices': 0
+    }
+    temp_path = None
+    
+    try:
+        # Находим размерность n
+        n = read_matrix_dimension(input_filename)
+        
+        if n is None:
+            print("Ошибка: не найдена размерность матриц в файле")
+            return False, stats
+        
+        input_dir = os.path.dirname(os.path.abspath(input_filename))
+        
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as odd_body, \
+                tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=input_dir,
+                                            delete=False, suffix='.tmp') as f_in:
+            temp_path = f_in.name
+            f_in.write(f"{n}\n\n")
             
-            # Если строка начинается с "Матрица", начинаем читать новую матрицу
-            if line.startswith("Матрица"):
-                matrix_num += 1
-                i += 1
+            for i, (matrix, diag_sum, _) in enumerate(iter_matrices_from_file(input_filename), 1):
+                stats['total_matrices'] += 1
                 
-                # Читаем n строк матрицы
-                matrix = []
-                for row_num in range(n):
-                    if i >= len(lines):
-                        break
+                if diag_sum % 2 == 1:  # Нечетная сумма
+                    stats['odd_sum_matrices'] += 1
+                    odd_body.write(f"Матрица {stats['odd_sum_matrices']} (сумма диагонали: {diag_sum}):\n")
                     
-                    row_line = lines[i].strip()
-                    # Разбираем строку на числа
-                    try:
-                        row = list(map(int, row_line.split()))
-                        if len(row) == n:
-                            matrix.append(row)
-                        else:
-                            print(f"Ошибка: строка {i+1} содержит {len(row)} чисел, ожидалось {n}")
-                            return [], 0, []
-                    except ValueError:
-                        print(f"Ошибка в строке {i+1}: '{row_line}' не является числами")
-                        return [], 0, []
+                    for row in matrix:
+                        odd_body.write("  " + "  ".join(f"{val:3}" for val in row) + "\n")
                     
-                    i += 1
-                
-                if len(matrix) == n:
-                    matrices.append(matrix)
-                    # Вычисляем сумму диагонали
-                    diag_sum = sum(matrix[i][i] for i in range(n))
-                    diag_sums.append(diag_sum)
+                    odd_body.write("\n")
+                    
+                    # Транспонируем для обновленного файла
+                    matrix = transpose_matrix_inplace(matrix)
+                    stats['transposed_matrices'] += 1
                 else:
-                    print(f"Ошибка: матрица {matrix_num} имеет неправильный размер")
-                    return [], 0, []
+                    stats['even_sum_matrices'] += 1
                 
-                # Пропускаем пустую строку после матрицы
-                i += 1
-            else:
-                i += 1
+                f_in.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
+                
+                for row in matrix:
+                    f_in.write("  " + "  ".join(f"{val:3}" for val in row) + "\n")
+                
+                f_in.write("\n")
+            
+            # Записываем матрицы с нечетными суммами
+            header = (f"Размерность матриц: {n}×{n}\n"
+                      f"Матрицы с нечетной суммой диагонали: {stats['odd_sum_matrices']}\n\n")
+            _write_with_header(output_filename, header, odd_body)
         
-        return matrices, n, diag_sums
+        # Заменяем исходный файл обновленным
+        shutil.copymode(input_filename, temp_path)
+        os.replace(temp_path, input_filename)
+        
+        return True, stats
+    
+    except Exception as e:
+        print(f"Ошибка: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, stats
+
+
+# Форматы строк матриц, которые пишут версии 1 и 2; при транспонировании
+# матрицы в таком формате длина ее записи в байтах не меняется
+ROW_LAYOUTS = {
+    'v1': lambda row: " ".join(f"{val:4}" for val in row),
+    'v2': lambda row: "  " + "  ".join(f"{val:3}" for val in row)
+}
+
+
+def _format_matrix_rows(matrix: List[List[int]], layout: str) -> bytes:
+    """
+    Форматирует строки матрицы в одном из форматов ROW_LAYOUTS.
+    
+    Параметры:
+    matrix (list): матрица
+    layout (str): ключ формата в ROW_LAYOUTS
+    
+    Возвращает:
+    bytes: строки матрицы в кодировке UTF-8
+    """
+    format_row = ROW_LAYOUTS[layout]
+    return "".join(format_row(row) + "\n" for row in matrix).encode('utf-8')
+
+
+def _detect_row_layout(matrix: List[List[int]], rows: bytes) -> Optional[str]:
+    """
+    Определяет формат, в котором записаны строки матрицы.
+    
+    Параметры:
+    matrix (list): разобранная матрица
+    rows (bytes): исходные строки матрицы из файла
+    
+    Возвращает:
+    str или None: ключ формата в ROW_LAYOUTS, если он воспроизводит строки точно
+    """
+    for layout in ROW_LAYOUTS:
+        if _format_matrix_rows(matrix, layout) == rows:
+            return layout
+    return None
+
+
+def process_matrices_inplace(input_filename: str, output_filename: str) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы, перезаписывая в исходном файле только
+    транспонируемые матрицы.
+    
+    Сумма диагонали и длина записи при транспонировании не меняются,
+    поэтому строки матриц с нечетными суммами перезаписываются на месте,
+    а остальная часть файла не трогается. Если строки какой-либо
+    нечетной матрицы записаны в неизвестном формате, файл целиком
+    обрабатывается версией 1.
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    output_filename (str): имя файла для матриц с нечетными суммами
+    
+    Возвращает:
+    tuple: (success, stats)
+    """
+    stats = {
+        'total_matrices': 0,
+        'odd_sum_matrices': 0,
+        'transposed_matrices': 0,
+        'even_sum_matrices': 0
+    }
+    
+    try:
+        # Границы записей нечетных матриц: rows_start, rows_end, ...
+        odd_ranges = array('q')
+        layout_known = True
+        
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as odd_body, \
+                open(input_filename, 'rb') as f_src:
+            for matrix, diag_sum, _, rows_start, rows_end in iter_matrix_records(input_filename):
+                stats['total_matrices'] += 1
+                
+                if diag_sum % 2 == 0:
+                    stats['even_sum_matrices'] += 1
+                    continue
+                
+                f_src.seek(rows_start)
+                if _detect_row_layout(matrix, f_src.read(rows_end - rows_start)) is None:
+                    layout_known = False
+                    break
+                
+                stats['odd_sum_matrices'] += 1
+                odd_ranges.extend((rows_start, rows_end))
+                
+                odd_body.write(f"Матрица {stats['odd_sum_matrices']} (сумма диагонали: {diag_sum}):\n")
+                for row in matrix:
+                    odd_body.write(" ".join(f"{val:4}" for val in row) + "\n")
+                odd_body.write("\n")
+            
+            if layout_known:
+                header = (f"Матрицы с нечетной суммой диагональных элементов:\n"
+                          f"Всего матриц: {stats['odd_sum_matrices']}\n\n")
+                _write_with_header(output_filename, header, odd_body)
+        
+        if not layout_known:
+            print("Формат строк не позволяет транспонировать на месте, "
+                  "файл будет перезаписан целиком")
+            success, v1_stats = process_matrices_v1(input_filename, output_filename)
+            # Версия 1 называет счетчик четных матриц по-своему
+            v1_stats['even_sum_matrices'] = v1_stats.pop('matrices_with_even_sum')
+            return success, v1_stats
+        
+        # Перезаписываем только строки нечетных матриц
+        with open(input_filename, 'r+b') as f:
+            for i in range(0, len(odd_ranges), 2):
+                rows_start, rows_end = odd_ranges[i], odd_ranges[i + 1]
+                f.seek(rows_start)
+                rows = f.read(rows_end - rows_start)
+                matrix = [list(map(int, line.split())) for line in rows.splitlines()]
+                
+                layout = _detect_row_layout(matrix, rows)
+                new_rows = _format_matrix_rows(transpose_matrix_inplace(matrix), layout)
+                f.seek(rows_start)
+                f.write(new_rows)
+                stats['transposed_matrices'] += 1
+        
+        return True, stats
+    
+    except Exception as e:
+        print(f"Ошибка: {e}")
+        return False, stats
+
+
+def _find_shard_boundaries(filename: str, shards: int) -> Tuple[List[int], List[int]]:
+    """
+    Делит файл на части по границам записей "Матрица ...".
+    
+    Параметры:
+    filename (str): имя файла
+    shards (int): желаемое количество частей
+    
+    Возвращает:
+    tuple: (boundaries, first_numbers)
+      boundaries: смещения начала частей в байтах и размер файла в конце
+      first_numbers: номер первой матрицы каждой части (с 1)
+    """
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    
+    with open(filename, 'rb') as f:
+        for i in range(1, shards):
+            target = max(size * i // shards, boundaries[-1])
+            f.seek(target)
+            offset = target
+            # Пропускаем неполную строку, на которую попало смещение
+            if target > 0:
+                offset += len(f.readline())
+            
+            for line in f:
+                if line.startswith(MATRIX_HEADER):
+                    break
+                offset += len(line)
+            
+            if boundaries[-1] < offset < size:
+                boundaries.append(offset)
+        
+        boundaries.append(size)
+        
+        # Номера матриц известны заранее, поэтому части пишут итоговые номера
+        first_numbers = [1]
+        for start, end in zip(boundaries[:-2], boundaries[1:-1]):
+            first_numbers.append(first_numbers[-1] + _count_matrix_headers(f, start, end))
+    
+    return boundaries, first_numbers
+
+
+def _count_matrix_headers(f, start: int, end: int, chunk_size: int = 1 << 20) -> int:
+    """
+    Считает строки, начинающиеся с заголовка "Матрица", в байтах [start, end)
+    двоичного файла f, читая его блоками без разбора строк.
+    """
+    pattern = b"\n" + MATRIX_HEADER
+    if start > 0:
+        f.seek(start - 1)
+        tail = f.read(1)
+    else:
+        f.seek(0)
+        tail = b"\n"
+    
+    count = 0
+    position = start
+    while position < end:
+        chunk = f.read(min(chunk_size, end - position))
+        if not chunk:
+            break
+        position += len(chunk)
+        data = tail + chunk
+        count += data.count(pattern)
+        # Хвост короче шаблона: совпадение на стыке блоков не посчитается дважды
+        tail = data[-(len(pattern) - 1):]
+    
+    return count
+
+
+def _process_matrix_shard(input_filename: str, start: int, end: int, n: int,
+                          temp_dir: str, first_num: int = 1) -> Tuple[str, str, int, int]:
+    """
+    Обрабатывает часть файла с матрицами в отдельном процессе.
+    
+    Матрицы обновленного файла нумеруются с first_num (итоговые номера),
+    нечетные матрицы - внутри части с 1: их итоговые номера зависят от
+    предыдущих частей и расставляются при склейке (_copy_renumbered).
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    start, end (int): границы части в байтах
+    n (int): размерность матриц
+    temp_dir (str): каталог для частичных файлов
+    first_num (int): номер первой матрицы части в исходном файле
+    
+    Возвращает:
+    tuple: (updated_path, odd_path, total, odd)
+      updated_path: часть обновленного исходного файла
+      odd_path: часть файла с нечетными матрицами
+      total, odd: количество всех и нечетных матриц в части
+    """
+    total = 0
+    odd = 0
+    
+    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=temp_dir,
+                                     delete=False, suffix='.part') as f_upd, \
+            tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=temp_dir,
+                                        delete=False, suffix='.part') as f_odd:
+        for matrix, diag_sum, _, _, _ in iter_matrix_records(input_filename, start, end, n):
+            total += 1
+            
+            if diag_sum % 2 == 1:
+                odd += 1
+                f_odd.write(f"Матрица {odd} (сумма диагонали: {diag_sum}):\n")
+                for row in matrix:
+                    f_odd.write(" ".join(f"{val:4}" for val in row) + "\n")
+                f_odd.write("\n")
+                
+                matrix = transpose_matrix_inplace(matrix)
+            
+            f_upd.write(f"Матрица {first_num + total - 1} (сумма диагонали: {diag_sum}):\n")
+            for row in matrix:
+                f_upd.write(" ".join(f"{val:4}" for val in row) + "\n")
+            f_upd.write("\n")
+    
+    return f_upd.name, f_odd.name, total, odd
+
+
+def _copy_renumbered(part_path: str, f_out, shift: int) -> None:
+    """
+    Дописывает частичный файл в f_out, увеличивая номера матриц на shift.
+    
+    Параметры:
+    part_path (str): частичный файл
+    f_out: открытый двоичный файл для записи
+    shift (int): на сколько сдвинуть номера в заголовках
+    """
+    with open(part_path, 'rb') as f_part:
+        if shift == 0:
+            shutil.copyfileobj(f_part, f_out)
+            return
+        
+        for line in f_part:
+            if line.startswith(MATRIX_HEADER):
+                prefix, num, rest = line.split(b' ', 2)
+                line = b'%s %d %s' % (prefix, int(num) + shift, rest)
+            f_out.write(line)
+
+
+def process_matrices_parallel(input_filename: str, output_filename: str,
+                              workers: Optional[int] = None) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы из файла в нескольких процессах.
+    
+    Файл делится на части по границам матриц, каждая часть обрабатывается
+    в ProcessPoolExecutor, частичные результаты склеиваются в исходном
+    порядке. Формат файлов совпадает с версией 1.
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    output_filename (str): имя файла для матриц с нечетными суммами
+    workers (int): количество процессов (None - по числу ядер)
+    
+    Возвращает:
+    tuple: (success, stats)
+    """
+    stats = {
+        'total_matrices': 0,
+        'odd_sum_matrices': 0,
+        'transposed_matrices': 0,
+        'even_sum_matrices': 0
+    }
+    temp_path = None
+    
+    try:
+        n = read_matrix_dimension(input_filename)
+        
+        if not n:
+            print("Ошибка: не найдена размерность матриц в файле")
+            return False, stats
+        
+        workers = workers or os.cpu_count() or 1
+        boundaries, first_numbers = _find_shard_boundaries(input_filename, workers)
+        starts, ends = boundaries[:-1], boundaries[1:]
+        shard_count = len(starts)
+        input_dir = os.path.dirname(os.path.abspath(input_filename))
+        
+        with tempfile.TemporaryDirectory(dir=input_dir) as temp_dir, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            shards = list(executor.map(_process_matrix_shard, [input_filename] * shard_count,
+                                       starts, ends, [n] * shard_count, [temp_dir] * shard_count,
+                                       first_numbers))
+            
+            # Сдвиги номеров: нечетные матрицы нумеруются в частях с 1, а для
+            # обновленного файла сдвиг ненулевой, только если подсчет заголовков
+            # в _find_shard_boundaries разошелся с разбором (например, заголовки
+            # с отступом)
+            updated_shifts, odd_shifts = [], []
+            for first_num, (_, _, total, odd) in zip(first_numbers, shards):
+                updated_shifts.append(stats['total_matrices'] + 1 - first_num)
+                odd_shifts.append(stats['odd_sum_matrices'])
+                stats['total_matrices'] += total
+                stats['odd_sum_matrices'] += odd
+            
+            with open(output_filename, 'wb') as f_out:
+                f_out.write((f"Матрицы с нечетной суммой диагональных элементов:\n"
+                             f"Всего матриц: {stats['odd_sum_matrices']}\n\n").encode('utf-8'))
+                for shard, shift in zip(shards, odd_shifts):
+                    _copy_renumbered(shard[1], f_out, shift)
+            
+            with tempfile.NamedTemporaryFile(mode='wb', dir=input_dir, delete=False,
+                                             suffix='.tmp') as f_in:
+                temp_path = f_in.name
+                f_in.write(f"{n}\n\n".encode('utf-8'))
+                for shard, shift in zip(shards, updated_shifts):
+                    _copy_renumbered(shard[0], f_in, shift)
+        
+        stats['transposed_matrices'] = stats['odd_sum_matrices']
+        stats['even_sum_matrices'] = stats['total_matrices'] - stats['odd_sum_matrices']
+        
+        shutil.copymode(input_filename, temp_path)
+        os.replace(temp_path, input_filename)
+        
+        return True, stats
+    
+    except Exception as e:
+        print(f"Ошибка: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, stats
+
+
+def _write_matrix_batch(f, matrices: np.ndarray, diag_sums: np.ndarray, start: int) -> None:
+    """
+    Записывает пакет матриц в текстовом формате версии 1.
+    
+    Параметры:
+    f: открытый файл для записи
+    matrices (ndarray): массив матриц формы (k, n, n)
+    diag_sums (ndarray): суммы диагоналей матриц
+    start (int): номер первой матрицы пакета
+    """
+    n = matrices.shape[1]
+    # Шаблон "%4d" дает тот же результат, что и f"{val:4}"
+    matrix_fmt = (" ".join(["%4d"] * n) + "\n") * n + "\n"
+    
+    for num, (matrix, diag_sum) in enumerate(zip(matrices, diag_sums.tolist()), start):
+        f.write(f"Матрица {num} (сумма диагонали: {diag_sum}):\n")
+        f.write(matrix_fmt % tuple(matrix.ravel().tolist()))
+
+
+def _process_matrix_batch(batch: np.ndarray, stats: dict, odd_body, f_in) -> None:
+    """
+    Обрабатывает пакет матриц векторизованно.
+    
+    Параметры:
+    batch (ndarray): массив матриц формы (k, n, n), изменяется на месте
+    stats (dict): статистика обработки
+    odd_body: файл для матриц с нечетными суммами
+    f_in: файл для обновленных матриц
+    """
+    # Суммы диагоналей всех матриц пакета за один вызов
+    diag_sums = np.einsum('kii->k', batch)
+    odd = diag_sums % 2 == 1
+    
+    odd_matrices = batch[odd]
+    _write_matrix_batch(odd_body, odd_matrices, diag_sums[odd], stats['odd_sum_matrices'] + 1)
+    
+    # Транспонируем все матрицы с нечетными суммами одной операцией
+    batch[odd] = odd_matrices.swapaxes(1, 2)
+    _write_matrix_batch(f_in, batch, diag_sums, stats['total_matrices'] + 1)
+    
+    odd_count = len(odd_matrices)
+    stats['total_matrices'] += len(batch)
+    stats['odd_sum_matrices'] += odd_count
+    stats['transposed_matrices'] += odd_count
+    stats['even_sum_matrices'] += len(batch) - odd_count
+
+
+def process_matrices_v3(input_filename: str, output_filename: str,
+                        batch_size: int = 10000) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы из файла (версия 3, на NumPy).
+    
+    Матрицы собираются в пакеты по batch_size штук в трехмерный массив,
+    суммы диагоналей и транспонирование вычисляются для всего пакета сразу.
+    Формат файлов совпадает с версией 1.
+    
+    Параметры:
+    input_filename (str): имя исходного файла
+    output_filename (str): имя файла для матриц с нечетными суммами
+    batch_size (int): количество матриц в пакете
+    
+    Возвращает:
+    tuple: (success, stats)
+    """
+    stats = {
+        'total_matrices': 0,
+        'odd_sum_matrices': 0,
+        'transposed_matrices': 0,
+        'even_sum_matrices': 0
+    }
+    temp_path = None
+    
+    try:
+        n = read_matrix_dimension(input_filename)
+        
+        if not n:
+            print("Ошибка: не найдена размерность матриц в файле")
+            return False, stats
+        
+        input_dir = os.path.dirname(os.path.abspath(input_filename))
+        
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as odd_body, \
+                tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', dir=input_dir,
+                                            delete=False, suffix='.tmp') as f_in:
+            temp_path = f_in.name
+            f_in.write(f"{n}\n\n")
+            
+            batch = []
+            for matrix, _, _, _, _ in iter_matrix_records(input_filename, as_array=True):
+                batch.append(matrix)
+                if len(batch) == batch_size:
+                    _process_matrix_batch(np.stack(batch), stats, odd_body, f_in)
+                    batch = []
+            
+            if batch:
+                _process_matrix_batch(np.stack(batch), stats, odd_body, f_in)
+            
+            header = (f"Матрицы с нечетной суммой диагональных элементов:\n"
+                      f"Всего матриц: {stats['odd_sum_matrices']}\n\n")
+            _write_with_header(output_filename, header, odd_body)
+        
+        shutil.copymode(input_filename, temp_path)
+        os.replace(temp_path, input_filename)
+        
+        return True, stats
+    
+    except Exception as e:
+        print(f"Ошибка: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, stats
+
+
+# Заголовок двоичного файла: сигнатура, dtype (например, '<i4'), n, k
+BINARY_MAGIC = b'MTRX'
+BINARY_HEADER = struct.Struct('<4s8sqq4x')
+
+
+def _read_binary_header(filename: str) -> Tuple[np.dtype, int, int]:
+    """
+    Читает заголовок двоичного файла с матрицами.
     
-    except Exception as e:
-        print(f"Ошибка при чтении файла: {e}")
-        return [], 0, []
+    Параметры:
+    filename (str): имя файла
+    
+    Возвращает:
+    tuple: (dtype, n, k)
+    
+    Исключения:
+    ValueError: если файл не является двоичным файлом матриц
+    """
+    with open(filename, 'rb') as f:
+        data = f.read(BINARY_HEADER.size)
+    
+    if len(data) < BINARY_HEADER.size:
+        raise ValueError(f"файл '{filename}' слишком короткий")
+    
+    magic, dtype, n, k = BINARY_HEADER.unpack(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"файл '{filename}' не является двоичным файлом матриц")
+    
+    return np.dtype(dtype.rstrip(b'\0').decode('ascii')), n, k
 
 
-def calculate_diagonal_sum(matrix: List[List[int]]) -> int:
+def open_binary_matrices(filename: str, mode: str = 'r') -> Tuple[np.ndarray, np.ndarray]:
     """
-    Вычисляет сумму диагональных элементов матрицы.
+    Открывает двоичный файл с матрицами через numpy.memmap.
+    
+    Файл не читается целиком: при изменении матриц на диск
+    записываются только затронутые страницы.
     
     Параметры:
-    matrix (list): матрица n×n
+    filename (str): имя файла
+    mode (str): режим memmap ('r' - только чтение, 'r+' - чтение и запись)
     
     Возвращает:
-    int: сумма диагональных элементов
+    tuple: (matrices, diag_sums)
+      matrices: массив формы (k, n, n)
+      diag_sums: массив сумм диагоналей формы (k,)
     """
-    n = len(matrix)
-    return sum(matrix[i][i] for i in range(n))
+    dtype, n, k = _read_binary_header(filename)
+    payload_size = k * n * n * dtype.itemsize
+    
+    # Пустую область отобразить в память нельзя
+    if k == 0:
+        return np.empty((0, n, n), dtype=dtype), np.empty(0, dtype='<i8')
+    
+    matrices = np.memmap(filename, dtype=dtype, mode=mode,
+                         offset=BINARY_HEADER.size, shape=(k, n, n))
+    diag_sums = np.memmap(filename, dtype='<i8', mode=mode,
+                          offset=BINARY_HEADER.size + payload_size, shape=(k,))
+    
+    return matrices, diag_sums
 
 
-def transpose_matrix(matrix: List[List[int]]) -> List[List[int]]:
+def text_to_binary_matrices(text_filename: str, binary_filename: str,
+                            dtype: str = '<i4', batch_size: int = 10000) -> int:
     """
-    Транспонирует матрицу.
+    Преобразует текстовый файл с матрицами в двоичный формат.
+    
+    Формат: заголовок (сигнатура, dtype, n, k), затем k матриц n×n
+    подряд, затем столбец сумм диагоналей (int64).
     
     Параметры:
-    matrix (list): исходная матрица n×n
+    text_filename (str): имя текстового файла
+    binary_filename (str): имя двоичного файла
+    dtype (str): тип элементов ('<i4' или '<i8')
+    batch_size (int): количество матриц, преобразуемых за раз
     
     Возвращает:
-    list: транспонированная матрица
+    int: количество записанных матриц
+    
+    Исключения:
+    ValueError: если размерность не найдена или значения не помещаются в dtype
     """
-    n = len(matrix)
-    transposed = [[0] * n for _ in range(n)]
+    dtype = np.dtype(dtype)
+    limits = np.iinfo(dtype)
+    n = read_matrix_dimension(text_filename)
     
-    for i in range(n):
-        for j in range(n):
-            transposed[i][j] = matrix[j][i]
+    if n is None:
+        raise ValueError(f"не найдена размерность матриц в файле '{text_filename}'")
     
-    return transposed
+    k = 0
+    with open(binary_filename, 'wb') as f_out, tempfile.TemporaryFile() as sums_file:
+        # Количество матриц пока неизвестно, заголовок перезапишем в конце
+        f_out.write(BINARY_HEADER.pack(BINARY_MAGIC, dtype.str.encode('ascii'), n, 0))
+        
+        def flush(batch, sums):
+            batch = np.stack(batch)
+            if batch.min() < limits.min or batch.max() > limits.max:
+                raise ValueError(f"значения матриц не помещаются в тип {dtype.str}")
+            f_out.write(batch.astype(dtype).tobytes())
+            sums_file.write(np.array(sums, dtype='<i8').tobytes())
+        
+        batch, sums = [], []
+        for matrix, diag_sum, _, _, _ in iter_matrix_records(text_filename, as_array=True):
+            batch.append(matrix)
+            sums.append(diag_sum)
+            k += 1
+            if len(batch) == batch_size:
+                flush(batch, sums)
+                batch, sums = [], []
+        
+        if batch:
+            flush(batch, sums)
+        
+        sums_file.seek(0)
+        shutil.copyfileobj(sums_file, f_out)
+        
+        f_out.seek(0)
+        f_out.write(BINARY_HEADER.pack(BINARY_MAGIC, dtype.str.encode('ascii'), n, k))
+    
+    return k
 
 
-def process_matrices_v1(input_filename: str, output_filename: str) -> Tuple[bool, dict]:
+def binary_to_text_matrices(binary_filename: str, text_filename: str, batch_size: int = 10000) -> int:
     """
-    Обрабатывает матрицы из файла (версия 1).
+    Преобразует двоичный файл с матрицами в текстовый формат
+    create_test_matrices_file.
     
     Параметры:
-    input_filename (str): имя исходного файла
-    output_filename (str): имя файла для матриц с нечетными суммами
+    binary_filename (str): имя двоичного файла
+    text_filename (str): имя текстового файла
+    batch_size (int): количество матриц, преобразуемых за раз
+    
+    Возвращает:
+    int: количество записанных матриц
+    """
+    matrices, diag_sums = open_binary_matrices(binary_filename)
+    k, n = matrices.shape[0], matrices.shape[1]
+    
+    with open(text_filename, 'w', encoding='utf-8') as f:
+        f.write(f"{n}\n")
+        for start in range(0, k, batch_size):
+            _write_matrix_batch(f, matrices[start:start + batch_size],
+                                diag_sums[start:start + batch_size], start + 1)
+    
+    return k
+
+
+def process_matrices_binary(input_filename: str, output_filename: str,
+                            batch_size: int = 10000) -> Tuple[bool, dict]:
+    """
+    Обрабатывает матрицы в двоичном формате.
+    
+    Матрицы с нечетными суммами копируются в двоичный файл output_filename
+    и транспонируются прямо в исходном файле через memmap, поэтому
+    перезаписываются только страницы с этими матрицами.
+    
+    Параметры:
+    input_filename (str): имя исходного двоичного файла
+    output_filename (str): имя двоичного файла для матриц с нечетными суммами
+    batch_size (int): количество матриц, транспонируемых за раз
     
     Возвращает:
     tuple: (success, stats)
@@ -180,205 +1191,324 @@ def process_matrices_v1(input_filename: str, output_filename: str) -> Tuple[bool
         'total_matrices': 0,
         'odd_sum_matrices': 0,
         'transposed_matrices': 0,
-        'matrices_with_even_sum': 0
+        'even_sum_matrices': 0
     }
     
     try:
-        # Читаем матрицы из файла
-        matrices, n, diag_sums = parse_matrices_from_file(input_filename)
-        
-        if n == 0:
-            print("Ошибка: не удалось прочитать матрицы из файла")
-            return False, stats
-        
-        stats['total_matrices'] = len(matrices)
-        
-        # Разделяем матрицы по четности суммы диагонали
-        odd_sum_matrices = []
-        even_sum_matrices = []
-        odd_sum_indices = []
+        matrices, diag_sums = open_binary_matrices(input_filename, mode='r+')
+        k, n = matrices.shape[0], matrices.shape[1]
+        odd_indices = np.flatnonzero(diag_sums % 2 == 1)
         
-        for idx, (matrix, diag_sum) in enumerate(zip(matrices, diag_sums)):
-            if diag_sum % 2 == 1:  # Нечетная сумма
-                odd_sum_matrices.append(matrix)
-                odd_sum_indices.append(idx)
-                stats['odd_sum_matrices'] += 1
-            else:
-                even_sum_matrices.append(matrix)
-                stats['matrices_with_even_sum'] += 1
-        
-        # Записываем матрицы с нечетными суммами в отдельный файл
-        with open(output_filename, 'w', encoding='utf-8') as f_out:
-            f_out.write(f"Матрицы с нечетной суммой диагональных элементов:\n")
-            f_out.write(f"Всего матриц: {stats['odd_sum_matrices']}\n\n")
+        with open(output_filename, 'wb') as f_out:
+            f_out.write(BINARY_HEADER.pack(BINARY_MAGIC, matrices.dtype.str.encode('ascii'),
+                                           n, len(odd_indices)))
             
-            for i, matrix in enumerate(odd_sum_matrices, 1):
-                diag_sum = calculate_diagonal_sum(matrix)
-                f_out.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
-                for row in matrix:
-                    row_str = " ".join(f"{val:4}" for val in row)
-                    f_out.write(row_str + "\n")
-                f_out.write("\n")
-        
-        # Транспонируем матрицы с нечетными суммами
-        transposed_matrices = matrices.copy()
+            for start in range(0, len(odd_indices), batch_size):
+                idx = odd_indices[start:start + batch_size]
+                odd_matrices = matrices[idx]
+                f_out.write(odd_matrices.tobytes())
+                matrices[idx] = odd_matrices.swapaxes(1, 2)
+            
+            f_out.write(np.asarray(diag_sums[odd_indices], dtype='<i8').tobytes())
         
-        for idx in odd_sum_indices:
-            transposed_matrices[idx] = transpose_matrix(matrices[idx])
-            stats['transposed_matrices'] += 1
+        if isinstance(matrices, np.memmap):
+            matrices.flush()
         
-        # Записываем обновленный исходный файл
-        with open(input_filename, 'w', encoding='utf-8') as f_in:
-            # Записываем размерность
-            f_in.write(f"{n}\n\n")
-            
-            for i, matrix in enumerate(transposed_matrices, 1):
-                diag_sum = calculate_diagonal_sum(matrix)
-                f_in.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
-                for row in matrix:
-                    row_str = " ".join(f"{val:4}" for val in row)
-                    f_in.write(row_str + "\n")
-                f_in.write("\n")
+        stats['total_matrices'] = k
+        stats['odd_sum_matrices'] = len(odd_indices)
+        stats['transposed_matrices'] = len(odd_indices)
+        stats['even_sum_matrices'] = k - len(odd_indices)
         
         return True, stats
     
     except Exception as e:
-        print(f"Ошибка при обработке файлов: {e}")
+        print(f"Ошибка: {e}")
         return False, stats
 
 
-def process_matrices_v2(input_filename: str, output_filename: str) -> Tuple[bool, dict]:
+# Версии обработки текстового файла, которые сравнивает бенчмарк
+PROCESS_ENGINES = {
+    'v1': process_matrices_v1,
+    'v2': process_matrices_v2,
+    'v3': process_matrices_v3,
+    'inplace': process_matrices_inplace,
+    'parallel': process_matrices_parallel
+}
+
+
+def _read_io_counters() -> Optional[Tuple[int, int]]:
     """
-    Обрабатывает матрицы из файла (версия 2, более эффективная).
+    Возвращает количество прочитанных и записанных процессом байт.
+    
+    Возвращает:
+    tuple или None: (rchar, wchar) из /proc/self/io, если он доступен
+    """
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _run_benchmark_engine(engine: str, input_filename: str, output_filename: str) -> dict:
+    """
+    Запускает одну версию обработки и замеряет ее (в отдельном процессе).
     
     Параметры:
+    engine (str): ключ версии в PROCESS_ENGINES
     input_filename (str): имя исходного файла
     output_filename (str): имя файла для матриц с нечетными суммами
     
     Возвращает:
-    tuple: (success, stats)
+    dict: success, seconds, peak_rss_mb, bytes_read, bytes_written
     """
-    stats = {
-        'total_matrices': 0,
-        'odd_sum_matrices': 0,
-        'transposed_matrices': 0,
-        'even_sum_matrices': 0
+    io_before = _read_io_counters()
+    start = time.perf_counter()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        success, _ = PROCESS_ENGINES[engine](input_filename, output_filename)
+    
+    seconds = time.perf_counter() - start
+    io_after = _read_io_counters()
+    
+    peak_rss_mb = None
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # На macOS ru_maxrss в байтах, на Linux - в килобайтах
+        peak_rss_mb = max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    
+    return {
+        'success': success,
+        'seconds': seconds,
+        'peak_rss_mb': peak_rss_mb,
+        'bytes_read': io_after[0] - io_before[0] if io_before and io_after else None,
+        'bytes_written': io_after[1] - io_before[1] if io_before and io_after else None
     }
+
+
+def benchmark_process_versions(k_values: Tuple[int, ...] = (10, 1000, 100000, 1000000),
+                               n_values: Tuple[int, ...] = (2, 8, 64, 512),
+                               engines: Optional[Tuple[str, ...]] = None,
+                               max_elements: int = 10 ** 7, seed: int = 0,
+                               json_filename: Optional[str] = None) -> List[dict]:
+    """
+    Сравнивает версии обработки матриц.
     
-    try:
-        # Открываем файлы
-        with open(input_filename, 'r', encoding='utf-8') as f_in:
-            content = f_in.read()
-        
-        lines = content.split('\n')
-        
-        # Находим размерность n
-        n = None
-        for line in lines:
-            if line.strip().isdigit():
-                n = int(line.strip())
-                break
-        
-        if n is None:
-            print("Ошибка: не найдена размерность матриц в файле")
-            return False, stats
-        
-        # Парсим матрицы
-        matrices = []
-        current_matrix = []
-        in_matrix = False
-        matrix_num = 0
+    Для каждой пары (k, n) создается одинаковый (по seed) тестовый файл,
+    который обрабатывается каждой версией в отдельном процессе, чтобы
+    пиковая память одной версии не влияла на другую. Пары, в которых
+    k·n² больше max_elements, пропускаются. Прочитанные и записанные байты
+    берутся из /proc/self/io (только Linux) и не включают дочерние
+    процессы параллельной версии.
+    
+    Параметры:
+    k_values (tuple): количества матриц
+    n_values (tuple): размерности матриц
+    engines (tuple): ключи версий из PROCESS_ENGINES (None - все)
+    max_elements (int): предельное количество элементов во входном файле
+    seed (int): seed генератора тестовых данных
+    json_filename (str): файл для результатов в формате JSON
+    
+    Возвращает:
+    list: словари с результатами (k, n, engine, seconds, peak_rss_mb,
+          bytes_read, bytes_written, matrices_per_second, success)
+    """
+    engines = engines or tuple(PROCESS_ENGINES)
+    results = []
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_file = os.path.join(temp_dir, "bench_matrices.txt")
+        output_file = os.path.join(temp_dir, "bench_odd_matrices.txt")
         
-        for line in lines:
-            stripped = line.strip()
-            
-            if not stripped:
-                continue
-            
-            if stripped.startswith("Матрица"):
-                # Начало новой матрицы
-                if current_matrix and len(current_matrix) == n:
-                    matrices.append(current_matrix)
-                    current_matrix = []
-                
-                matrix_num += 1
-                in_matrix = True
-                continue
-            
-            if in_matrix:
-                # Читаем строку матрицы
-                try:
-                    row = list(map(int, stripped.split()))
-                    if len(row) == n:
-                        current_matrix.append(row)
-                        
-                        # Если собрали полную матрицу
-                        if len(current_matrix) == n:
-                            matrices.append(current_matrix)
-                            current_matrix = []
-                            in_matrix = False
-                    else:
-                        print(f"Ошибка: строка содержит {len(row)} чисел, ожидалось {n}")
-                        return False, stats
-                except ValueError:
-                    # Если это не числа, пропускаем
+        for k in k_values:
+            for n in n_values:
+                if k * n * n > max_elements:
                     continue
-        
-        # Добавляем последнюю матрицу, если есть
-        if current_matrix and len(current_matrix) == n:
-            matrices.append(current_matrix)
-        
-        stats['total_matrices'] = len(matrices)
-        
-        # Обработка матриц
-        odd_sum_matrices = []
-        updated_matrices = []
-        
-        for matrix in matrices:
-            diag_sum = calculate_diagonal_sum(matrix)
-            
-            if diag_sum % 2 == 1:  # Нечетная сумма
-                odd_sum_matrices.append(matrix)
-                # Транспонируем для обновленного файла
-                updated_matrices.append(transpose_matrix(matrix))
-                stats['odd_sum_matrices'] += 1
-                stats['transposed_matrices'] += 1
-            else:
-                updated_matrices.append(matrix)
-                stats['even_sum_matrices'] += 1
-        
-        # Записываем матрицы с нечетными суммами
-        with open(output_filename, 'w', encoding='utf-8') as f_out:
-            f_out.write(f"Размерность матриц: {n}×{n}\n")
-            f_out.write(f"Матрицы с нечетной суммой диагонали: {len(odd_sum_matrices)}\n\n")
-            
-            for i, matrix in enumerate(odd_sum_matrices, 1):
-                diag_sum = calculate_diagonal_sum(matrix)
-                f_out.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
                 
-                for row in matrix:
-                    f_out.write("  " + "  ".join(f"{val:3}" for val in row) + "\n")
-                
-                f_out.write("\n")
+                for engine in engines:
+                    random.seed(seed)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        create_test_matrices_file(input_file, k, n)
+                    
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                        run = executor.submit(_run_benchmark_engine, engine,
+                                              input_file, output_file).result()
+                    
+                    run['matrices_per_second'] = k / run['seconds'] if run['success'] else None
+                    results.append({'k': k, 'n': n, 'engine': engine, **run})
+    
+    print(f"\n{'k':>9} {'n':>5} {'версия':>9} {'время, с':>10} {'RSS, МБ':>9} "
+          f"{'прочитано':>12} {'записано':>12} {'матриц/с':>11}")
+    for row in results:
+        if not row['success']:
+            print(f"{row['k']:>9} {row['n']:>5} {row['engine']:>9} {'ошибка':>10}")
+            continue
+        rss = f"{row['peak_rss_mb']:.1f}" if row['peak_rss_mb'] is not None else "-"
+        bytes_read = row['bytes_read'] if row['bytes_read'] is not None else "-"
+        bytes_written = row['bytes_written'] if row['bytes_written'] is not None else "-"
+        print(f"{row['k']:>9} {row['n']:>5} {row['engine']:>9} {row['seconds']:>10.3f} {rss:>9} "
+              f"{bytes_read:>12} {bytes_written:>12} {row['matrices_per_second']:>11.0f}")
+    
+    if json_filename:
+        with open(json_filename, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в '{json_filename}'")
+    
+    return results
+
+
+# Заголовок индекса: сигнатура, n, размер и время изменения файла, число матриц
+INDEX_MAGIC = b'MIDX'
+INDEX_HEADER = struct.Struct('<4s4xqqqq')
+# Запись индекса: границы строк матрицы в байтах и сумма диагонали
+INDEX_RECORD = np.dtype([('rows_start', '<i8'), ('rows_end', '<i8'), ('diag_sum', '<i8')])
+
+
+def _index_filename(filename: str) -> str:
+    """Возвращает имя индексного файла для файла с матрицами."""
+    return filename + '.idx'
+
+
+def build_matrix_index(filename: str, batch_size: int = 100000) -> str:
+    """
+    Строит индекс файла с матрицами: номер матрицы -> смещение и сумма диагонали.
+    
+    Записи индекса фиксированной длины, поэтому запись k-й матрицы
+    находится без чтения остальных.
+    
+    Параметры:
+    filename (str): имя файла с матрицами
+    batch_size (int): количество записей, записываемых за раз
+    
+    Возвращает:
+    str: имя индексного файла
+    """
+    index_filename = _index_filename(filename)
+    file_stat = os.stat(filename)
+    n = read_matrix_dimension(filename) or 0
+    count = 0
+    
+    with open(index_filename, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, n, 0, 0, 0))
         
-        # Записываем обновленный исходный файл
-        with open(input_filename, 'w', encoding='utf-8') as f_in:
-            f_in.write(f"{n}\n\n")
-            
-            for i, matrix in enumerate(updated_matrices, 1):
-                diag_sum = calculate_diagonal_sum(matrix)
-                f_in.write(f"Матрица {i} (сумма диагонали: {diag_sum}):\n")
-                
-                for row in matrix:
-                    f_in.write("  " + "  ".join(f"{val:3}" for val in row) + "\n")
-                
-                f_in.write("\n")
+        records = []
+        for matrix, diag_sum, _, rows_start, rows_end in iter_matrix_records(filename):
+            n = n or len(matrix)
+            records.append((rows_start, rows_end, diag_sum))
+            if len(records) == batch_size:
+                f.write(np.array(records, dtype=INDEX_RECORD).tobytes())
+                count += len(records)
+                records = []
         
-        return True, stats
+        if records:
+            f.write(np.array(records, dtype=INDEX_RECORD).tobytes())
+            count += len(records)
+        
+        f.seek(0)
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, n, file_stat.st_size, file_stat.st_mtime_ns, count))
     
-    except Exception as e:
-        print(f"Ошибка: {e}")
-        return False, stats
+    return index_filename
+
+
+def _read_index_header(filename: str) -> Optional[Tuple[int, int]]:
+    """
+    Читает заголовок индекса, если индекс соответствует текущему файлу.
+    
+    Параметры:
+    filename (str): имя файла с матрицами
+    
+    Возвращает:
+    tuple или None: (n, count), либо None, если индекса нет или он устарел
+    """
+    index_filename = _index_filename(filename)
+    if not os.path.exists(index_filename):
+        return None
+    
+    with open(index_filename, 'rb') as f:
+        data = f.read(INDEX_HEADER.size)
+    
+    if len(data) < INDEX_HEADER.size:
+        return None
+    
+    magic, n, size, mtime_ns, count = INDEX_HEADER.unpack(data)
+    file_stat = os.stat(filename)
+    
+    if magic != INDEX_MAGIC or size != file_stat.st_size or mtime_ns != file_stat.st_mtime_ns:
+        return None
+    
+    return n, count
+
+
+def load_matrix_index(filename: str) -> Tuple[int, np.ndarray]:
+    """
+    Открывает индекс файла с матрицами, при необходимости перестраивая его.
+    
+    Индекс считается действительным, пока размер и время изменения
+    файла совпадают с записанными в индексе.
+    
+    Параметры:
+    filename (str): имя файла с матрицами
+    
+    Возвращает:
+    tuple: (n, records)
+      n: размерность матриц
+      records: массив записей INDEX_RECORD (отображается в память)
+    """
+    header = _read_index_header(filename)
+    if header is None:
+        build_matrix_index(filename)
+        header = _read_index_header(filename)
+    
+    n, count = header
+    if count == 0:
+        return n, np.empty(0, dtype=INDEX_RECORD)
+    
+    records = np.memmap(_index_filename(filename), dtype=INDEX_RECORD, mode='r',
+                        offset=INDEX_HEADER.size, shape=(count,))
+    return n, records
+
+
+def read_matrix_by_number(filename: str, matrix_num: int) -> Optional[Tuple[List[List[int]], int]]:
+    """
+    Читает матрицу с заданным номером через индекс, не просматривая файл.
+    
+    Параметры:
+    filename (str): имя файла с матрицами
+    matrix_num (int): номер матрицы (с 1)
+    
+    Возвращает:
+    tuple или None: (matrix, diag_sum), либо None, если матрицы с таким номером нет
+    """
+    n, records = load_matrix_index(filename)
+    
+    if not 1 <= matrix_num <= len(records):
+        return None
+    
+    record = records[matrix_num - 1]
+    rows_start, rows_end = int(record['rows_start']), int(record['rows_end'])
+    
+    with open(filename, 'rb') as f:
+        f.seek(rows_start)
+        rows = f.read(rows_end - rows_start).splitlines(keepends=True)
+    
+    # Номер строки в сообщении об ошибке неизвестен без просмотра файла
+    matrix = parse_matrix_rows(rows, n, 0)
+    return matrix.tolist(), int(record['diag_sum'])
+
+
+def odd_matrix_numbers(filename: str) -> np.ndarray:
+    """
+    Возвращает номера матриц с нечетной суммой диагонали по индексу.
+    
+    Параметры:
+    filename (str): имя файла с матрицами
+    
+    Возвращает:
+    ndarray: номера матриц (с 1)
+    """
+    _, records = load_matrix_index(filename)
+    return np.flatnonzero(records['diag_sum'] % 2 == 1) + 1
 
 
 def display_file_content(filename: str, title: str = "Содержимое файла", max_matrices: int = 5) -> None:
@@ -465,20 +1595,21 @@ def compare_files(input_filename: str, output_filename: str) -> dict:
         comparison['output_exists'] = os.path.exists(output_filename)
         
         if comparison['input_exists']:
-            matrices, n, diag_sums = parse_matrices_from_file(input_filename)
-            comparison['input_matrices'] = len(matrices)
+            comparison['input_matrices'] = 0
+            comparison['input_odd_matrices'] = 0
             
-            # Проверяем, есть ли матрицы с нечетными суммами
-            odd_sum_indices = [i for i, s in enumerate(diag_sums) if s % 2 == 1]
-            comparison['input_odd_matrices'] = len(odd_sum_indices)
+            # Считаем матрицы с нечетными суммами, не загружая файл целиком
+            for _, diag_sum, _ in iter_matrices_from_file(input_filename):
+                comparison['input_matrices'] += 1
+                if diag_sum % 2 == 1:
+                    comparison['input_odd_matrices'] += 1
         
         if comparison['output_exists']:
-            output_matrices, n_out, output_diag_sums = parse_matrices_from_file(output_filename)
-            comparison['output_matrices'] = len(output_matrices)
-            
             # Проверяем, что все матрицы в output имеют нечетные суммы
-            all_odd = all(s % 2 == 1 for s in output_diag_sums)
-            comparison['all_odd_in_output'] = all_odd
+            for _, diag_sum, _ in iter_matrices_from_file(output_filename):
+                comparison['output_matrices'] += 1
+                if diag_sum % 2 == 0:
+                    comparison['all_odd_in_output'] = False
         
         # Если оба файла существуют
         if comparison['input_exists'] and comparison['output_exists']:
@@ -544,6 +1675,66 @@ def matrix_to_string(matrix: List[List[int]], matrix_num: int = None) -> str:
     return result
 
 
+# Функция для тестирования функций обработки матриц
+def test_matrix_functions():
+    """
+    Тестирование разбора и транспонирования матриц.
+    
+    Возвращает:
+    bool: True, если все тесты пройдены успешно
+    """
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ОБРАБОТКИ МАТРИЦ")
+    print("=" * 60)
+    
+    test_results = []
+    
+    # Тест 1: Корректная матрица с выравниванием
+    try:
+        result = parse_matrix_rows([b'   1    2\n', b'   3    4\n'], 2, 2).tolist()
+        expected = [[1, 2], [3, 4]]
+        test_results.append(result == expected)
+        print(f"✓ Корректная матрица: {result} == {expected}")
+    except Exception as e:
+        test_results.append(False)
+        print(f"✗ Корректная матрица: ошибка - {e}")
+    
+    # Тест 2: Строки с разным числом элементов при верном общем количестве
+    try:
+        parse_matrix_rows([b'1 2 3 4\n', b'5     6\n', b'7  8  9\n'], 3, 2)
+        test_results.append(False)
+        print("✗ Строки разной длины: ошибка не обнаружена")
+    except ValueError as e:
+        expected = "строка 2 содержит 4 чисел, ожидалось 3"
+        test_results.append(str(e) == expected)
+        print(f"✓ Строки разной длины: {e}")
+    
+    # Тест 3: Значения вне диапазона int64
+    try:
+        big = 10**25
+        matrix = parse_matrix_rows([f'{big} 1\n'.encode(), b'2 3\n'], 2, 2)
+        result = (matrix.tolist(), int(np.trace(matrix)))
+        expected = ([[big, 1], [2, 3]], big + 3)
+        test_results.append(result == expected)
+        print(f"✓ Большие числа: {result} == {expected}")
+    except Exception as e:
+        test_results.append(False)
+        print(f"✗ Большие числа: ошибка - {e}")
+    
+    # Тест 4: Транспонирование на месте отклоняет неквадратный список
+    try:
+        transpose_matrix_inplace([[1, 2, 3], [4, 5]])
+        test_results.append(False)
+        print("✗ Неквадратная матрица: ошибка не обнаружена")
+    except ValueError as e:
+        test_results.append(True)
+        print(f"✓ Неквадратная матрица: {e}")
+    
+    passed = sum(test_results)
+    print(f"\nПройдено тестов: {passed}/{len(test_results)}")
+    return passed == len(test_results)
+
+
 def interactive_mode():
     """
     Интерактивный режим работы программы.
@@ -560,9 +1751,15 @@ def interactive_mode():
         print("4. Показать содержимое файлов")
         print("5. Сравнить файлы")
         print("6. Протестировать отдельные функции")
+        print("7. Обработать матрицы (версия 3, NumPy)")
+        print("8. Сравнить скорость версий")
+        print("9. Обработать матрицы на месте (только нечетные)")
+        print("10. Обработать матрицы в нескольких процессах")
+        print("11. Показать матрицу по номеру")
+        print("12. Показать номера матриц с нечетной суммой")
         print("0. Выход")
         
-        choice = input("\nВыберите действие (0-6): ").strip()
+        choice = input("\nВыберите действие (0-12): ").strip()
         
         if choice == '0':
             print("Выход из программы...")
@@ -585,7 +1782,7 @@ def interactive_mode():
             except ValueError:
                 print("Ошибка: введите корректные числа")
         
-        elif choice in ['2', '3']:
+        elif choice in ['2', '3', '7', '9', '10']:
             # Обработка матриц
             input_file = input("Введите имя исходного файла (по умолчанию: matrices.txt): ").strip()
             if not input_file:
@@ -599,8 +1796,14 @@ def interactive_mode():
             
             if choice == '2':
                 success, stats = process_matrices_v1(input_file, output_file)
-            else:
+            elif choice == '3':
                 success, stats = process_matrices_v2(input_file, output_file)
+            elif choice == '7':
+                success, stats = process_matrices_v3(input_file, output_file)
+            elif choice == '9':
+                success, stats = process_matrices_inplace(input_file, output_file)
+            else:
+                success, stats = process_matrices_parallel(input_file, output_file)
             
             if success:
                 print("✓ Операция выполнена успешно!")
@@ -692,6 +1895,48 @@ def interactive_mode():
             is_square2 = validate_matrix(non_square)
             print(f"4. Неквадратная матрица (2x3): {'Да' if is_square2 else 'Нет'}")
         
+        elif choice == '8':
+            # Сравнение скорости версий
+            try:
+                k_input = input("Количества матриц через пробел (по умолчанию: 100 10000): ").strip()
+                k_values = tuple(map(int, k_input.split())) if k_input else (100, 10000)
+                n_input = input("Размерности матриц через пробел (по умолчанию: 3): ").strip()
+                n_values = tuple(map(int, n_input.split())) if n_input else (3,)
+                json_file = input("Файл для результатов JSON (Enter - не сохранять): ").strip()
+                
+                benchmark_process_versions(k_values, n_values, json_filename=json_file or None)
+                
+            except ValueError:
+                print("Ошибка: введите корректные числа")
+        
+        elif choice in ['11', '12']:
+            # Работа с матрицами через индекс
+            input_file = input("Введите имя файла (по умолчанию: matrices.txt): ").strip()
+            if not input_file:
+                input_file = "matrices.txt"
+            
+            try:
+                if choice == '11':
+                    matrix_num = int(input("Номер матрицы: "))
+                    found = read_matrix_by_number(input_file, matrix_num)
+                    
+                    if found is None:
+                        print(f"Матрицы с номером {matrix_num} нет")
+                    else:
+                        matrix, diag_sum = found
+                        print(matrix_to_string(matrix, matrix_num), end="")
+                        print(f"Сумма диагонали: {diag_sum} "
+                              f"({'нечетная' if diag_sum % 2 == 1 else 'четная'})")
+                else:
+                    numbers = odd_matrix_numbers(input_file)
+                    print(f"Матриц с нечетной суммой: {len(numbers)}")
+                    print(" ".join(map(str, numbers[:100].tolist())) + (" ..." if len(numbers) > 100 else ""))
+            
+            except ValueError:
+                print("Ошибка: введите корректное число")
+            except Exception as e:
+                print(f"Ошибка: {e}")
+        
         else:
             print("Неверный выбор. Попробуйте снова.")
 